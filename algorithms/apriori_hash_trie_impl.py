@@ -5,18 +5,21 @@ Hash-table + Cross-linked list based Apriori implementation
 
 from collections import defaultdict
 from itertools import combinations
-import math
 from typing import List, Dict, Any, Tuple, Set, Optional
 
-from utils import compute_cosine
+from utils import Itemset, Transactions, as_transaction_db
+from algorithms.candidate_trie import CandidateTrie
+from algorithms.apriori_tid import TidLists, raw_size, should_switch
+from algorithms.rulegen import generate_rules
 
 
 class TrieNode:
     """十字链表节点 - 用于存储事务中的项目及其关系"""
-    __slots__ = ['item', 'count', 'right', 'down']
+    __slots__ = ['item', 'tid', 'count', 'right', 'down']
     
-    def __init__(self, item: Optional[str] = None):
-        self.item = item              # 项目名称
+    def __init__(self, item: Optional[int] = None, tid: int = -1):
+        self.item = item              # 项目编号
+        self.tid = tid                # 所在事务编号（同项链按 tid 递增）
         self.count = 0                # 支持度计数
         self.right = None             # 右指针：同一事务中的下一项
         self.down = None              # 下指针：同一项在其他事务中的出现
@@ -81,23 +84,24 @@ class CrossLinkedList:
     """
     def __init__(self):
         self.head = None              # 事务链表头
-        self.item_index: Dict[str, TrieNode] = {}  # 项目索引
+        self.tx_heads: List[TrieNode] = []          # 每条事务的首节点
+        self.item_index: Dict[int, TrieNode] = {}  # 项目索引（同项链头）
+        self.item_tail: Dict[int, TrieNode] = {}   # 同项链尾，O(1) 追加
+        self.item_count: Dict[int, int] = {}       # 同项链长度，即1-项集支持计数
     
-    def build_from_transactions(self, transactions: List[List[str]]) -> None:
+    def build_from_transactions(self, transactions: List[Itemset]) -> None:
         """从事务集合构建十字链表"""
-        current_transaction = None
-        
-        for tx in transactions:
+        for tid, tx in enumerate(transactions):
             if not tx:
                 continue
             
-            # 对事务中的项目排序，便于后续遍历
-            sorted_items = sorted(set(tx))
+            # 事务已由 TransactionDB 去重并排序
+            sorted_items = tx
             tx_head = None
             tx_tail = None
             
             for item in sorted_items:
-                node = TrieNode(item)
+                node = TrieNode(item, tid)
                 
                 # 建立右指针（同事务链）
                 if tx_head is None:
@@ -106,64 +110,59 @@ class CrossLinkedList:
                     tx_tail.right = node
                 tx_tail = node
                 
-                # 建立下指针（同项链）
+                # 建立下指针（同项链）：借助尾指针直接追加
                 if item not in self.item_index:
                     self.item_index[item] = node
+                    self.item_count[item] = 1
                 else:
-                    # 在该项的链表末尾添加新节点
-                    current = self.item_index[item]
-                    while current.down is not None:
-                        current = current.down
-                    current.down = node
+                    self.item_tail[item].down = node
+                    self.item_count[item] += 1
+                self.item_tail[item] = node
             
-            # 建立事务链
+            # 建立事务链（单独记录事务首节点，不占用事务内的右指针）
             if self.head is None:
                 self.head = tx_head
-                current_transaction = tx_head
-            else:
-                current_transaction.right = tx_head
-                current_transaction = tx_head
+            self.tx_heads.append(tx_head)
     
     def count_itemset(self, itemset: frozenset) -> int:
         """
-        通过十字链表高效计算项集的支持度
-        利用下指针快速遍历同项的所有出现
+        通过十字链表的纵向结构计算项集的支持度
+        
+        各项的同项链都按 tid 递增，支持计数即这些链的交集大小：
+        以最短的链为主链，其余链只向前推进，整体为一次归并扫描
         """
-        items = sorted(itemset)
-        if not items:
+        if not itemset:
             return 0
-        
-        # 获取第一项的所有出现节点
-        first_item = items[0]
-        if first_item not in self.item_index:
+        if any(item not in self.item_index for item in itemset):
             return 0
         
-        count = 0
-        current_node = self.item_index[first_item]
+        # 按链长升序，最稀有的项作为主链
+        items = sorted(itemset, key=self.item_count.__getitem__)
+        driver = self.item_index[items[0]]
+        others = [self.item_index[item] for item in items[1:]]
         
-        # 遍历第一项的所有出现
-        while current_node is not None:
-            # 对每个出现，检查是否包含其他所有项
-            all_present = True
-            
-            for other_item in items[1:]:
-                # 在同事务中查找其他项
-                check_node = current_node.right
-                found = False
-                while check_node is not None:
-                    if check_node.item == other_item:
-                        found = True
-                        break
-                    check_node = check_node.right
-                
-                if not found:
-                    all_present = False
+        count = 0
+        while driver is not None:
+            tid = driver.tid
+            matched = True
+            for idx, node in enumerate(others):
+                while node is not None and node.tid < tid:
+                    node = node.down
+                if node is None:
+                    # 某条链已耗尽，不可能再有公共事务
+                    return count
+                others[idx] = node
+                if node.tid != tid:
+                    matched = False
+                    tid = node.tid
                     break
-            
-            if all_present:
+            if matched:
                 count += 1
-            
-            current_node = current_node.down
+                driver = driver.down
+            else:
+                # 主链直接跳到不小于当前最大 tid 的位置
+                while driver is not None and driver.tid < tid:
+                    driver = driver.down
         
         return count
 
@@ -212,49 +211,55 @@ def _apriori_gen(prev_freq: List[frozenset]) -> List[frozenset]:
     return candidates
 
 
-def run(transactions: List[List[str]], min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
+def mine_itemsets(transactions: Transactions, min_support: float,
+                  counting: str = "vertical") -> Dict[Itemset, int]:
     """
-    基于哈希表与十字链表的改进Apriori算法
+    基于哈希表与十字链表的改进Apriori算法，返回全部频繁项集及其支持计数
     
     优势：
     1. 十字链表加速支持度计算 - O(1)级别的项集查询
     2. 哈希表高效存储和查询候选项集
     3. 减少重复扫描事务集
     4. 更低的时间复杂度
+    
+    counting 选择候选集计数方式：
+    - "vertical": 沿十字链表的同项链求交（默认）
+    - "trie": 候选前缀树 + 事务子集枚举，每条事务只走能匹配的分支
+    - "hybrid": AprioriHybrid，先按 "trie" 扫描原始事务并记录每条事务包含的候选编号，
+      当这份 TID 列表的规模小于原始事务时，后续各层只在 TID 列表上计数
     """
-    n_tx = len(transactions)
+    if counting not in ("vertical", "trie", "hybrid"):
+        raise ValueError(f"unknown counting mode: {counting!r}")
+    db = as_transaction_db(transactions)
+    n_tx = db.n_tx
     if n_tx == 0:
-        return []
-    
-    min_sup_count = max(1, math.ceil(min_support * n_tx))
+        return {}
     
-    # 规范化事务（去重、排序）
-    norm_tx = [sorted(set(tx)) for tx in transactions if tx]
+    min_sup_count = db.min_count(min_support)
     
     # ==================== 第1步：构建十字链表 ====================
+    # 整数编码后的事务已去重、排序，空事务在构建时跳过
     cross_list = CrossLinkedList()
-    cross_list.build_from_transactions(norm_tx)
+    cross_list.build_from_transactions(db.transactions)
     
     # ==================== 第2步：统计1-项集 ====================
+    # 频繁项集支持计数（键为排序后的编号元组）
+    counts: Dict[Itemset, int] = {}
     freq1_hash = HashTable()
-    support_map: Dict[frozenset, float] = {}
-    
-    for item, node in cross_list.item_index.items():
-        # 计算项的支持度
-        count = 0
-        current = node
-        while current is not None:
-            count += 1
-            current = current.down
-        
+    for item, count in cross_list.item_count.items():
         if count >= min_sup_count:
-            itemset_fs = frozenset([item])
-            freq1_hash.insert(itemset_fs, count)
-            support_map[itemset_fs] = count / n_tx
+            freq1_hash.insert(frozenset([item]), count)
+            counts[(item,)] = count
     
     # ==================== 第3步：递归挖掘频繁项集 ====================
+    # AprioriHybrid 状态：TID 列表及上一层频繁项集 -> 编号
+    scan_size = raw_size(db.transactions)
+    tid_lists: Optional[TidLists] = None
+    tid_index: Dict[Itemset, int] = {}
+    
     def mine_recursive(freq_itemsets: HashTable, k: int) -> None:
         """递归挖掘更大的频繁项集"""
+        nonlocal tid_lists, tid_index
         if freq_itemsets.count == 0:
             return
         
@@ -265,85 +270,61 @@ def run(transactions: List[List[str]], min_support: float, min_confidence: float
         if not candidates:
             return
         
-        # 使用哈希表存储候选项集的支持度
-        candidate_hash = HashTable()
-        
-        # 扫描事务，计算候选项集的支持度
-        for tx in norm_tx:
-            tx_items = set(tx)
-            
-            # 使用组合快速过滤候选项
-            for candidate in candidates:
-                if candidate.issubset(tx_items):
-                    candidate_hash.increment(candidate)
-        
-        # 筛选出频繁的候选项集
         freq_k_hash = HashTable()
-        for candidate, count in candidate_hash.items():
+        collected: Optional[List[List[int]]] = None
+        if counting == "vertical":
+            # 借助十字链表的同项链纵向计数，无需逐条扫描事务
+            cand_counts = [cross_list.count_itemset(c) for c in candidates]
+        else:
+            cand_tuples = [tuple(sorted(c)) for c in candidates]
+            if tid_lists is not None:
+                # AprioriTid：候选包含于事务 <=> 两个生成元都在该事务的 TID 列表中
+                cand_counts = tid_lists.count(cand_tuples, tid_index)
+            else:
+                # 候选前缀树：一次扫描事务，按子集枚举走树
+                trie = CandidateTrie(cand_tuples)
+                if counting == "hybrid":
+                    collected = []
+                    for tx in db.transactions:
+                        found = trie.count_transaction(tx)
+                        if len(found) > k:
+                            collected.append(found)
+                else:
+                    trie.count(db.transactions)
+                cand_counts = trie.counts
+        
+        frequent_ids: Dict[int, int] = {}
+        for ci, (candidate, count) in enumerate(zip(candidates, cand_counts)):
             if count >= min_sup_count:
                 freq_k_hash.insert(candidate, count)
-                support_map[candidate] = count / n_tx
+                counts[tuple(sorted(candidate))] = count
+                frequent_ids[ci] = ci
+        
+        if counting == "hybrid":
+            # 编号沿用本层候选下标，只保留频繁项集的编号
+            if tid_lists is None and collected is not None:
+                tids = TidLists(collected, k)
+                tids.keep(frequent_ids)
+                if should_switch(tids.size(), scan_size):
+                    tid_lists = tids
+            elif tid_lists is not None:
+                tid_lists.keep(frequent_ids)
+            tid_index = {cand_tuples[ci]: ci for ci in frequent_ids}
         
         # 递归处理下一层
         mine_recursive(freq_k_hash, k + 1)
     
-    # 初始化1-项集哈希表
-    freq1_hash_for_mining = HashTable()
-    for itemset, supp in support_map.items():
-        if len(itemset) == 1:
-            freq1_hash_for_mining.insert(itemset, int(supp * n_tx))
-    
-    mine_recursive(freq1_hash_for_mining, 2)
-    
-    # ==================== 第4步：生成关联规则 ====================
-    rules: List[Dict[str, Any]] = []
-    
-    for itemset, supp in support_map.items():
-        if len(itemset) < 2:
-            continue
-        
-        items = tuple(sorted(itemset))
-        
-        # 枚举所有可能的前件-后件组合
-        for r in range(1, len(items)):
-            for antecedent in combinations(items, r):
-                antecedent_fs = frozenset(antecedent)
-                consequent_fs = itemset - antecedent_fs
-                
-                if not consequent_fs:
-                    continue
-                
-                supp_ante = support_map.get(antecedent_fs, 0)
-                supp_cons = support_map.get(consequent_fs, 0)
-                
-                if not supp_ante or supp_ante == 0:
-                    continue
-                
-                confidence = supp / supp_ante
-                
-                if confidence + 1e-12 < min_confidence:
-                    continue
-                
-                # 计算其他度量
-                lift = None
-                leverage = None
-                conviction = None
-                
-                if supp_cons and supp_cons > 0:
-                    lift = confidence / supp_cons
-                    leverage = supp - supp_ante * supp_cons
-                    if 1 - confidence != 0:
-                        conviction = (1 - supp_cons) / (1 - confidence)
-                
-                rules.append({
-                    "antecedent": tuple(sorted(antecedent_fs)),
-                    "consequent": tuple(sorted(consequent_fs)),
-                    "support": supp,
-                    "confidence": confidence,
-                    "lift": lift,
-                    "leverage": leverage,
-                    "conviction": conviction,
-                    "cosine": compute_cosine(supp, lift),
-                })
+    mine_recursive(freq1_hash, 2)
+    return counts
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        counting: str = "vertical") -> List[Dict[str, Any]]:
+    """挖掘频繁项集（见 mine_itemsets），再生成关联规则"""
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return []
+    counts = mine_itemsets(db, min_support, counting)
     
-    return rules
+    # 共用的 ap-genrules：只由置信的后件扩展更大的后件
+    return generate_rules(counts, db.n_tx, min_confidence, db.decode)
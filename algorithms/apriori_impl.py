@@ -1,25 +1,26 @@
 from typing import List, Dict, Any
+import numpy as np
 from mlxtend.frequent_patterns import apriori, association_rules
-from utils import transactions_to_df, compute_cosine
+from utils import Itemset, Transactions, as_transaction_db, transactions_to_df, rules_df_to_records
 
 
-def run(transactions: List[List[str]], min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
+def run(transactions: Transactions, min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
     """Run Apriori using mlxtend and return a list of rule dicts."""
+    # Dense on purpose: mlxtend's sparse apriori path is ~2x slower, and its peak
+    # memory is the candidate matrix it builds, not the one-hot input
     df = transactions_to_df(transactions)
     freq = apriori(df, min_support=min_support, use_colnames=True)
     if freq.empty:
         return []
     rules_df = association_rules(freq, metric="confidence", min_threshold=min_confidence)
-    rules: List[Dict[str, Any]] = []
-    for _, row in rules_df.iterrows():
-        rules.append({
-            "antecedent": tuple(sorted(row["antecedents"])),
-            "consequent": tuple(sorted(row["consequents"])),
-            "support": float(row["support"]),
-            "confidence": float(row["confidence"]),
-            "lift": float(row["lift"]),
-            "leverage": float(row["leverage"]),
-            "conviction": float(row["conviction"]),
-            "cosine": compute_cosine(float(row["support"]), float(row["lift"])),
-        })
-    return rules
+    return rules_df_to_records(rules_df)
+
+
+def mine_itemsets(transactions: Transactions, min_support: float) -> Dict[Itemset, int]:
+    """mlxtend's frequent itemsets as support counts keyed by sorted item-id tuples."""
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return {}
+    freq = apriori(transactions_to_df(db), min_support=min_support, use_colnames=True)
+    counts = np.rint(freq["support"].to_numpy(dtype=float) * db.n_tx).astype(int).tolist()
+    return {db.encode(itemset): cnt for itemset, cnt in zip(freq["itemsets"], counts)}
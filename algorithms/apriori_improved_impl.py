@@ -1,125 +1,176 @@
-from collections import Counter, defaultdict
+from array import array
 from itertools import combinations
-import math
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional
 
-from utils import compute_cosine
+from utils import Itemset, Transactions, as_transaction_db
+from algorithms.candidate_trie import CandidateTrie, apriori_gen
+from algorithms.apriori_tid import TidLists, raw_size, should_switch
+from algorithms.rulegen import generate_rules
 
 
-def _apriori_gen(prev_freq: List[Tuple[str, ...]]) -> List[Tuple[str, ...]]:
-    """Join step to produce size-(k+1) candidates from size-k frequent itemsets."""
-    if not prev_freq:
-        return []
-    k = len(prev_freq[0]) + 1
-    prev_set = set(prev_freq)
-    candidates = []
-    prev_sorted = sorted(prev_freq)
-    for i in range(len(prev_sorted)):
-        for j in range(i + 1, len(prev_sorted)):
-            a, b = prev_sorted[i], prev_sorted[j]
-            if a[:-1] != b[:-1]:
-                break
-            candidate = tuple(sorted(set(a) | set(b)))
-            if len(candidate) != k:
-                continue
-            # Apriori pruning: all (k-1) subsets must be frequent
-            all_subsets_frequent = True
-            for sub in combinations(candidate, k - 1):
-                if sub not in prev_set:
-                    all_subsets_frequent = False
-                    break
-            if all_subsets_frequent:
-                candidates.append(candidate)
-    return candidates
-
-
-def run(transactions: List[List[str]], min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
-    """Apriori with hash-bucket pruning and recursive level expansion."""
-    n_tx = len(transactions)
+def _hash_bitmap(transactions: List[Itemset], k: int, n_buckets: int, min_count: int) -> bytearray:
+    """PCY/DHP bucket bitmap: hash every k-combination of each transaction, keep buckets reaching min_count."""
+    buckets = array("l", bytes(8 * n_buckets))
+    for tx in transactions:
+        for comb in combinations(tx, k):
+            buckets[hash(comb) % n_buckets] += 1
+    return bytearray(c >= min_count for c in buckets)
+
+
+def mine_itemsets(transactions: Transactions, min_support: float,
+                  n_buckets: int = 100003, hybrid: bool = True,
+                  pass_stats: Optional[List[Dict[str, Any]]] = None) -> Dict[Itemset, int]:
+    """
+    Apriori with DHP/PCY hash-bucket pruning, transaction trimming and prefix-trie counting.
+
+    While level k is counted, every (k+1)-combination of each (trimmed)
+    transaction is hashed into `n_buckets` buckets; (k+1)-candidates whose
+    bucket stays below min support are discarded before they are counted.
+    In the same pass an item is trimmed from a transaction unless it occurs in
+    at least k of the k-candidates the transaction contains, and transactions
+    left with at most k items are dropped.
+
+    With `hybrid` (AprioriHybrid), the raw pass also records which candidates
+    each transaction contains; once that TID-list database is smaller than the
+    trimmed transactions, later levels count through it instead (hash pruning
+    stops there, since it needs raw transactions). If `pass_stats` is a list,
+    one dict per pass is appended with what the pass pruned.
+    """
+    db = as_transaction_db(transactions)
+    n_tx = db.n_tx
     if n_tx == 0:
-        return []
+        return {}
 
-    min_sup_count = max(1, math.ceil(min_support * n_tx))
-    bucket_mod = 1009  # prime bucket size for hash-based pruning
+    min_sup_count = db.min_count(min_support)
 
-    # Normalize transactions to de-duplicate items per transaction and sort for stable combinations
-    norm_tx = [sorted(set(tx)) for tx in transactions if tx]
+    # 1-itemset counts come with the encoding
+    freq1 = {(item,): db.item_counts[item] for item in db.frequent_items(min_sup_count)}
+    support_counts: Dict[Itemset, int] = dict(freq1)
 
-    # Count 1-itemsets
-    counter = Counter()
-    for tx in norm_tx:
-        counter.update(tx)
-    freq1 = {(item,): cnt for item, cnt in counter.items() if cnt >= min_sup_count}
-    support_map: Dict[frozenset, float] = {frozenset(k): v / n_tx for k, v in freq1.items()}
+    # Pass 1: keep only frequent items and hash the remaining pairs
+    frequent_items = {item for (item,) in freq1}
+    norm_tx = []
+    for tx in db.transactions:
+        trimmed = tuple(item for item in tx if item in frequent_items)
+        if len(trimmed) >= 2:
+            norm_tx.append(trimmed)
+    bitmap = _hash_bitmap(norm_tx, 2, n_buckets, min_sup_count)
+    if pass_stats is not None:
+        pass_stats.append({
+            "level": 1,
+            "mode": "raw",
+            "candidates": db.n_items,
+            "pruned_by_hash": 0,
+            "frequent": len(freq1),
+            "transactions_in": n_tx,
+            "transactions_dropped": n_tx - len(norm_tx),
+            "items_trimmed": sum(len(tx) for tx in db.transactions) - sum(len(tx) for tx in norm_tx),
+        })
 
-    def count_with_hash(candidates: List[Tuple[str, ...]], k: int) -> Dict[Tuple[str, ...], int]:
+    prev_freq: Dict[Itemset, int] = freq1
+    tid_lists: Optional[TidLists] = None
+    k = 2
+    while prev_freq and (norm_tx or tid_lists):
+        generated = apriori_gen(list(prev_freq.keys()))
+        if tid_lists is None:
+            candidates = [c for c in generated if bitmap[hash(c) % n_buckets]]
+        else:
+            candidates = generated
         if not candidates:
-            return {}
-        cand_set = set(candidates)
-        bucket_counts = defaultdict(int)
-        support_counts = defaultdict(int)
+            break
+
+        if tid_lists is not None:
+            # AprioriTid pass: count through the generators' ids, no raw scan
+            entries_in = len(tid_lists)
+            index = {itemset: i for i, itemset in enumerate(prev_freq)}
+            counts = tid_lists.count(candidates, index)
+            freq_k = {c: cnt for c, cnt in zip(candidates, counts) if cnt >= min_sup_count}
+            new_ids = {c: i for i, c in enumerate(freq_k)}
+            tid_lists.keep({ci: new_ids[c] for ci, c in enumerate(candidates) if c in new_ids})
+            if pass_stats is not None:
+                pass_stats.append({
+                    "level": k,
+                    "mode": "tid",
+                    "candidates": len(generated),
+                    "pruned_by_hash": 0,
+                    "frequent": len(freq_k),
+                    "transactions_in": entries_in,
+                    "transactions_dropped": entries_in - len(tid_lists),
+                    "items_trimmed": 0,
+                })
+            support_counts.update(freq_k)
+            prev_freq = freq_k
+            k += 1
+            continue
+
+        # Count level k and, in the same pass, trim transactions and hash level k+1
+        trie = CandidateTrie(candidates)
+        buckets = array("l", bytes(8 * n_buckets))
+        next_tx = []
+        items_before = 0
+        items_after = 0
+        # C̄_k for AprioriHybrid, abandoned once it outgrows the raw data
+        collecting = hybrid
+        collected: List[List[int]] = []
+        collected_size = 0
+        budget = raw_size(norm_tx)
         for tx in norm_tx:
-            if len(tx) < k:
+            found = trie.count_transaction(tx)
+            items_before += len(tx)
+            if len(found) < k + 1:
+                # A (k+1)-itemset in tx needs k+1 of its k-subsets among the candidates
                 continue
-            for comb in combinations(tx, k):
-                h = hash(comb) % bucket_mod
-                bucket_counts[h] += 1
-                if comb in cand_set:
-                    support_counts[comb] += 1
-        # Hash-bucket pruning before applying min_sup
-        pruned_candidates = {c for c in candidates if bucket_counts[hash(c) % bucket_mod] >= min_sup_count}
-        return {c: cnt for c, cnt in support_counts.items() if cnt >= min_sup_count and c in pruned_candidates}
-
-    def mine(prev_freq: Dict[Tuple[str, ...], int], k: int) -> None:
-        if not prev_freq:
-            return
-        candidates = _apriori_gen(list(prev_freq.keys()))
-        if not candidates:
-            return
-        freq_k = count_with_hash(candidates, k)
-        if not freq_k:
-            return
-        for itemset, cnt in freq_k.items():
-            support_map[frozenset(itemset)] = cnt / n_tx
-        mine(freq_k, k + 1)
-
-    mine(freq1, 2)
-
-    # Generate association rules from support map
-    rules: List[Dict[str, Any]] = []
-    for itemset, supp in support_map.items():
-        if len(itemset) < 2:
-            continue
-        items = tuple(sorted(itemset))
-        for r in range(1, len(items)):
-            for antecedent in combinations(items, r):
-                antecedent_fs = frozenset(antecedent)
-                consequent_fs = itemset - antecedent_fs
-                if not consequent_fs:
-                    continue
-                supp_ante = support_map.get(antecedent_fs)
-                supp_cons = support_map.get(consequent_fs)
-                if not supp_ante or supp_ante == 0:
-                    continue
-                confidence = supp / supp_ante
-                if confidence + 1e-12 < min_confidence:
-                    continue
-                lift = None
-                leverage = None
-                conviction = None
-                if supp_cons and supp_cons > 0:
-                    lift = confidence / supp_cons
-                    leverage = supp - supp_ante * supp_cons
-                    if 1 - confidence != 0:
-                        conviction = (1 - supp_cons) / (1 - confidence)
-                rules.append({
-                    "antecedent": tuple(sorted(antecedent_fs)),
-                    "consequent": tuple(sorted(consequent_fs)),
-                    "support": supp,
-                    "confidence": confidence,
-                    "lift": lift,
-                    "leverage": leverage,
-                    "conviction": conviction,
-                    "cosine": compute_cosine(supp, lift),
-                })
-    return rules
+            if collecting:
+                collected.append(found)
+                collected_size += len(found) + 1
+                if collected_size >= budget:
+                    collecting = False
+                    collected = []
+            occurrences: Dict[int, int] = {}
+            for idx in found:
+                for item in trie.candidates[idx]:
+                    occurrences[item] = occurrences.get(item, 0) + 1
+            trimmed = tuple(item for item in tx if occurrences.get(item, 0) >= k)
+            if len(trimmed) <= k:
+                continue
+            next_tx.append(trimmed)
+            items_after += len(trimmed)
+            for comb in combinations(trimmed, k + 1):
+                buckets[hash(comb) % n_buckets] += 1
+
+        freq_k = trie.frequent(min_sup_count)
+        if pass_stats is not None:
+            pass_stats.append({
+                "level": k,
+                "mode": "raw",
+                "candidates": len(generated),
+                "pruned_by_hash": len(generated) - len(candidates),
+                "frequent": len(freq_k),
+                "transactions_in": len(norm_tx),
+                "transactions_dropped": len(norm_tx) - len(next_tx),
+                "items_trimmed": items_before - items_after,
+            })
+        support_counts.update(freq_k)
+        if collecting:
+            new_ids = {c: i for i, c in enumerate(freq_k)}
+            tids = TidLists(collected, k)
+            tids.keep({ci: new_ids[c] for ci, c in enumerate(trie.candidates) if c in new_ids})
+            if should_switch(tids.size(), raw_size(next_tx)):
+                tid_lists = tids
+        bitmap = bytearray(c >= min_sup_count for c in buckets)
+        norm_tx = next_tx
+        prev_freq = freq_k
+        k += 1
+
+    return support_counts
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        n_buckets: int = 100003, hybrid: bool = True,
+        pass_stats: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """DHP/PCY Apriori (see mine_itemsets()) followed by the shared rule generation."""
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return []
+    support_counts = mine_itemsets(db, min_support, n_buckets, hybrid, pass_stats)
+    return generate_rules(support_counts, db.n_tx, min_confidence, db.decode)
@@ -0,0 +1,89 @@
+"""
+Out-of-core Apriori over a transaction file read in chunks.
+
+Every level is one sequential pass over the source, so memory holds the
+candidates of the current level plus one chunk, never the whole database.
+The source is a text file (read by utils.iter_transaction_chunks()) or a
+MappedTransactions dataset (read by rows() from the mapped pages). The first
+pass counts single items and builds the vocabulary; a mapped dataset already
+has both, its item_counts come from one pass over the item array. Later
+passes restrict each transaction to the frequent item ids (an infrequent
+item is in no candidate) and count the level-k candidates with the shared
+CandidateTrie. Item ids are those of TransactionDB over the same data, so
+results match the in-memory engines.
+"""
+
+import math
+from typing import List, Dict, Any, Iterator, Tuple, Union
+
+from utils import Itemset, MappedTransactions, iter_transaction_chunks
+from algorithms.candidate_trie import CandidateTrie, apriori_gen
+from algorithms.rulegen import generate_rules
+
+Source = Union[str, MappedTransactions]
+
+
+def _frequent_rows(source: Source, ids: Dict[str, int], chunk_size: int) -> Iterator[Itemset]:
+    """One pass over the source, each transaction restricted to the ids in `ids`."""
+    if isinstance(source, MappedTransactions):
+        keep = set(ids.values())
+        for tx in source.rows(chunk_size=chunk_size):
+            yield tuple(i for i in tx if i in keep)
+        return
+    for chunk in iter_transaction_chunks(source, chunk_size):
+        for tx in chunk:
+            yield tuple(sorted({ids[item] for item in tx if item in ids}))
+
+
+def scan_itemsets(source: Source, min_support: float,
+                  chunk_size: int = 10000) -> Tuple[Dict[Itemset, int], List[str], int]:
+    """Frequent itemsets of a text file or mapped dataset with their counts, plus the vocabulary (id order) and n_tx."""
+    if isinstance(source, MappedTransactions):
+        items, counts, n_tx = source.items, source.item_counts, source.n_tx
+    else:
+        item_counts: Dict[str, int] = {}
+        n_tx = 0
+        for chunk in iter_transaction_chunks(source, chunk_size):
+            n_tx += len(chunk)
+            for tx in chunk:
+                for item in set(tx):
+                    item_counts[item] = item_counts.get(item, 0) + 1
+        items = sorted(item_counts)
+        counts = [item_counts[item] for item in items]
+    if n_tx == 0:
+        return {}, items, 0
+    # Same rounding as TransactionDB.min_count()
+    min_sup_count = max(1, math.ceil(min_support * n_tx))
+
+    ids = {item: i for i, item in enumerate(items) if counts[i] >= min_sup_count}
+    frequent: Dict[Itemset, int] = {(i,): counts[i] for i in ids.values()}
+    level = sorted(frequent)
+    k = 2
+    while True:
+        candidates = apriori_gen(level)
+        if not candidates:
+            break
+        trie = CandidateTrie(candidates)
+        for encoded in _frequent_rows(source, ids, chunk_size):
+            if len(encoded) >= k:
+                trie.count_transaction(encoded)
+        level_freq = trie.frequent(min_sup_count)
+        if not level_freq:
+            break
+        frequent.update(level_freq)
+        level = sorted(level_freq)
+        k += 1
+    return frequent, items, n_tx
+
+
+def mine_itemsets(source: Source, min_support: float, chunk_size: int = 10000) -> Dict[Itemset, int]:
+    """All frequent itemsets of a text file or mapped dataset with their support counts, keyed by sorted item-id tuples."""
+    return scan_itemsets(source, min_support, chunk_size)[0]
+
+
+def run(source: Source, min_support: float, min_confidence: float, chunk_size: int = 10000) -> List[Dict[str, Any]]:
+    """Out-of-core Apriori over a text file or mapped dataset followed by the shared rule generation."""
+    frequent, items, n_tx = scan_itemsets(source, min_support, chunk_size)
+    if n_tx == 0:
+        return []
+    return generate_rules(frequent, n_tx, min_confidence, lambda itemset: tuple(sorted(items[i] for i in itemset)))
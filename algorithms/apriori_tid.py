@@ -0,0 +1,84 @@
+"""
+AprioriTid / AprioriHybrid 事务缩减
+TID-list counting shared by the Apriori implementations.
+
+After level k every transaction is replaced by the ids of the level-k
+itemsets it contains (the C̄_k set of AprioriTid); transactions containing
+none are dropped. A (k+1)-candidate c is contained in a transaction iff both
+of its generators c[:-1] and c[:-2] + c[-1:] are, so later passes only scan
+the shrinking id sets. AprioriHybrid starts on raw transactions and switches
+once the estimated size of C̄_k drops below the raw data still to be scanned.
+"""
+
+from typing import List, Dict, Iterable, Set, Tuple
+
+from utils import Itemset
+
+
+def should_switch(tid_size: int, raw_size: int) -> bool:
+    """AprioriHybrid switch: TID lists pay off once they are smaller than the raw transactions."""
+    return tid_size < raw_size
+
+
+def raw_size(transactions: Iterable[Itemset]) -> int:
+    """Cost of a raw scan: one unit per item plus one per transaction."""
+    size = 0
+    for tx in transactions:
+        size += len(tx) + 1
+    return size
+
+
+class TidLists:
+    """C̄_k: for every surviving transaction, the set of level-k itemset ids it contains."""
+
+    def __init__(self, entries: Iterable[Iterable[int]], k: int):
+        self.k = k
+        self.entries: List[Set[int]] = [set(e) for e in entries]
+        self.entries = [e for e in self.entries if e]
+
+    def size(self) -> int:
+        """Same measure as raw_size(): ids plus one per entry."""
+        return sum(len(e) for e in self.entries) + len(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def count(self, candidates: List[Itemset], index: Dict[Itemset, int]) -> List[int]:
+        """
+        Count (k+1)-candidates through their generators' ids in `index`
+        (level-k itemset -> id) and advance every entry to candidate ids.
+        """
+        by_first: Dict[int, List[Tuple[int, int]]] = {}
+        for ci, cand in enumerate(candidates):
+            a = index[cand[:-1]]
+            b = index[cand[:-2] + cand[-1:]]
+            by_first.setdefault(a, []).append((ci, b))
+
+        counts = [0] * len(candidates)
+        next_entries: List[Set[int]] = []
+        for entry in self.entries:
+            found: Set[int] = set()
+            for a in entry:
+                for ci, b in by_first.get(a, ()):
+                    if b in entry:
+                        found.add(ci)
+            if found:
+                for ci in found:
+                    counts[ci] += 1
+                next_entries.append(found)
+        self.entries = next_entries
+        self.k += 1
+        return counts
+
+    def keep(self, ids: Dict[int, int]) -> None:
+        """
+        Re-map entries to the ids of the frequent itemsets (old id -> new id),
+        dropping entries too small to contain any (k+1)-candidate.
+        """
+        min_len = self.k + 1
+        entries = []
+        for entry in self.entries:
+            kept = {ids[i] for i in entry if i in ids}
+            if len(kept) >= min_len:
+                entries.append(kept)
+        self.entries = entries
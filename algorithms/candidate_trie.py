@@ -0,0 +1,106 @@
+"""
+候选项集前缀树 - Apriori 各层候选集的支持度计数
+Candidate prefix trie shared by the Apriori implementations.
+
+Candidates of one level k are stored as paths of a trie over sorted item ids.
+Counting walks each transaction down the trie by subset enumeration, so a
+transaction only visits the branches it can still complete: the cost follows
+the number of matching candidates, not |C| or C(|t|, k). apriori_gen() is
+the shared join + prune step producing those candidates.
+"""
+
+from itertools import combinations
+from typing import List, Dict, Iterable
+
+from utils import Itemset
+
+
+def apriori_gen(prev_freq: List[Itemset]) -> List[Itemset]:
+    """Join step to produce size-(k+1) candidates from size-k frequent itemsets."""
+    if not prev_freq:
+        return []
+    k = len(prev_freq[0]) + 1
+    prev_set = set(prev_freq)
+    candidates = []
+    prev_sorted = sorted(prev_freq)
+    for i in range(len(prev_sorted)):
+        for j in range(i + 1, len(prev_sorted)):
+            a, b = prev_sorted[i], prev_sorted[j]
+            if a[:-1] != b[:-1]:
+                break
+            candidate = tuple(sorted(set(a) | set(b)))
+            if len(candidate) != k:
+                continue
+            # Apriori pruning: all (k-1) subsets must be frequent
+            all_subsets_frequent = True
+            for sub in combinations(candidate, k - 1):
+                if sub not in prev_set:
+                    all_subsets_frequent = False
+                    break
+            if all_subsets_frequent:
+                candidates.append(candidate)
+    return candidates
+
+
+class CandidateTrie:
+    """Prefix trie over sorted size-k candidates; leaves index into `counts`."""
+
+    def __init__(self, candidates: Iterable[Itemset]):
+        self.candidates: List[Itemset] = list(candidates)
+        self.k = len(self.candidates[0]) if self.candidates else 0
+        self.counts: List[int] = [0] * len(self.candidates)
+        self.root: Dict[int, object] = {}
+        last = self.k - 1
+        for idx, cand in enumerate(self.candidates):
+            node = self.root
+            for depth, item in enumerate(cand):
+                if depth == last:
+                    node[item] = idx
+                else:
+                    node = node.setdefault(item, {})
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def matches(self, tx: Itemset) -> List[int]:
+        """Indices of the candidates contained in the sorted transaction `tx`."""
+        found: List[int] = []
+        k = self.k
+        if k == 0 or len(tx) < k:
+            return found
+        n = len(tx)
+
+        def walk(node: Dict[int, object], start: int, depth: int) -> None:
+            # Items past n - (k - depth) cannot be followed by enough items to finish a path
+            stop = n - (k - depth) + 1
+            if depth == k - 1:
+                for i in range(start, stop):
+                    idx = node.get(tx[i])
+                    if idx is not None:
+                        found.append(idx)
+                return
+            for i in range(start, stop):
+                child = node.get(tx[i])
+                if child is not None:
+                    walk(child, i + 1, depth + 1)
+
+        walk(self.root, 0, 0)
+        return found
+
+    def count_transaction(self, tx: Itemset) -> List[int]:
+        """Add one to every candidate contained in `tx`; returns their indices."""
+        found = self.matches(tx)
+        counts = self.counts
+        for idx in found:
+            counts[idx] += 1
+        return found
+
+    def count(self, transactions: Iterable[Itemset]) -> Dict[Itemset, int]:
+        """Count all candidates over `transactions` and return candidate -> count."""
+        for tx in transactions:
+            self.count_transaction(tx)
+        return dict(zip(self.candidates, self.counts))
+
+    def frequent(self, min_count: int) -> Dict[Itemset, int]:
+        """Candidates whose accumulated count reaches `min_count`."""
+        return {c: cnt for c, cnt in zip(self.candidates, self.counts) if cnt >= min_count}
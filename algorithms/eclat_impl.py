@@ -1,82 +1,330 @@
-import math
-from typing import List, Dict, Any, Iterable, Tuple, Set
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Tuple, Set, Union, Callable, Optional
 
-from utils import compute_cosine
+from utils import Itemset, Transactions, TransactionDB, as_transaction_db
+from algorithms.rulegen import generate_rules
 
+# A tidset is either a Python set of transaction ids or a packed bit vector stored
+# in an arbitrary-precision int (bit t is set iff transaction t contains the itemset).
+# Both support `&`; support is len() for sets and a popcount for bitsets.
+Tidset = Union[Set[int], int]
 
-def run(transactions: List[List[str]], min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
-    """Simple Eclat implementation returning association rules."""
-    n_tx = len(transactions)
-    if n_tx == 0:
-        return []
-    min_sup_count = max(1, math.ceil(min_support * n_tx))
+# Mean relative support of the frequent items above which "auto" picks bitsets.
+# A bitset always costs n_tx / 8 bytes, a set costs a few dozen bytes per tid, so
+# bitsets win on memory once roughly one transaction in a hundred holds the item
+# (and win on time well before that: an AND over n_tx / 64 words beats hashing).
+BITSET_MIN_DENSITY = 0.005
+
+# Estimated work (sum over top-level classes of support x suffix length) below
+# which workers > 1 still mines serially: about a quarter second of Eclat, on
+# the order of starting a process pool and shipping the tidsets to it.
+PARALLEL_MIN_WORK = 5_000_000
 
-    # Build vertical format: item -> tidset
-    tidsets: Dict[str, Set[int]] = {}
-    for tid, tx in enumerate(transactions):
+
+def build_tidsets(db: TransactionDB, items: Iterable[int], representation: str) -> Dict[int, Tidset]:
+    """Vertical layout for the given item ids, as sets or bitsets."""
+    wanted = set(items)
+    tid_lists: Dict[int, List[int]] = {item: [] for item in wanted}
+    for tid, tx in enumerate(db.transactions):
         for item in tx:
-            tidsets.setdefault(item, set()).add(tid)
+            if item in wanted:
+                tid_lists[item].append(tid)
+    if representation == "set":
+        return {item: set(tids) for item, tids in tid_lists.items()}
+    n_bytes = (db.n_tx + 7) // 8
+    bitsets: Dict[int, Tidset] = {}
+    for item, tids in tid_lists.items():
+        buf = bytearray(n_bytes)
+        for tid in tids:
+            buf[tid >> 3] |= 1 << (tid & 7)
+        bitsets[item] = int.from_bytes(buf, "little")
+    return bitsets
 
-    # Filter infrequent singletons
-    items = [(item, tids) for item, tids in tidsets.items() if len(tids) >= min_sup_count]
-    # Sort by support for deterministic behavior
-    items.sort(key=lambda x: (len(x[1]), x[0]))
 
-    frequent: Dict[frozenset, Set[int]] = {}
+def choose_representation(db: TransactionDB, items: List[int], tidset: str = "auto") -> str:
+    """Resolve the `tidset` switch of run() to "set" or "bitset"."""
+    if tidset not in ("auto", "set", "bitset"):
+        raise ValueError(f"unknown tidset representation: {tidset!r}")
+    if tidset != "auto":
+        return tidset
+    if not items or db.n_tx == 0:
+        return "set"
+    density = sum(db.item_counts[i] for i in items) / (len(items) * db.n_tx)
+    return "bitset" if density >= BITSET_MIN_DENSITY else "set"
 
-    def eclat(prefix: Tuple[str, ...], items_list: List[Tuple[str, Set[int]]]):
-        for i, (item, tids) in enumerate(items_list):
-            new_itemset = frozenset(prefix + (item,))
-            frequent[new_itemset] = tids
-            suffix: List[Tuple[str, Set[int]]] = []
-            for j in range(i + 1, len(items_list)):
-                item2, tids2 = items_list[j]
-                inter = tids & tids2
-                if len(inter) >= min_sup_count:
-                    suffix.append((item2, inter))
-            if suffix:
-                eclat(prefix + (item,), suffix)
 
-    eclat((), items)
+def support_counter(representation: str) -> Callable[[Tidset], int]:
+    return len if representation == "set" else int.bit_count
+
+
+def difference(representation: str) -> Callable[[Tidset, Tidset], Tidset]:
+    """a - b for either representation (bitsets: a AND NOT b)."""
+    if representation == "set":
+        return lambda a, b: a - b
+    return lambda a, b: a & ~b
 
-    if not frequent:
-        return []
 
-    # Cache supports
-    support_cache: Dict[frozenset, float] = {fs: len(tids) / n_tx for fs, tids in frequent.items()}
-
-    rules: List[Dict[str, Any]] = []
-    for itemset, tids in frequent.items():
-        if len(itemset) < 2:
-            continue
-        support_itemset = support_cache[itemset]
-        items_list = list(itemset)
-        for i in range(len(items_list)):
-            antecedent = frozenset(item for idx, item in enumerate(items_list) if idx != i)
-            consequent = frozenset({items_list[i]})
-            support_ante = support_cache.get(antecedent)
-            support_cons = support_cache.get(consequent)
-            if not support_ante or support_ante == 0:
+def eclat_mine(items: List[Tuple[int, Tidset, int]], min_sup_count: int, representation: str,
+               diffset: str = "auto", prefix: Tuple[int, ...] = (),
+               classes: Optional[Iterable[int]] = None) -> Dict[Itemset, int]:
+    """
+    Depth-first Eclat / dEclat over the (item, tidset, support) triples extending `prefix`.
+
+    `diffset` is "never", "always" or "auto" (switch a class to diffsets once they are
+    smaller than its tidsets); `classes` limits mining to those top-level positions.
+    """
+    if diffset not in ("auto", "never", "always"):
+        raise ValueError(f"unknown diffset mode: {diffset!r}")
+    count = support_counter(representation)
+    minus = difference(representation)
+    frequent: Dict[Itemset, int] = {}
+
+    def eclat(prefix: Tuple[int, ...], items_list: List[Tuple[int, Tidset, int]], diff: bool,
+              positions: Optional[Iterable[int]] = None):
+        for i in range(len(items_list)) if positions is None else positions:
+            item, vec, sup = items_list[i]
+            new_prefix = prefix + (item,)
+            frequent[tuple(sorted(new_prefix))] = sup
+            suffix: List[Tuple[int, Tidset, int]] = []
+            if diff:
+                for j in range(i + 1, len(items_list)):
+                    item2, vec2, _ = items_list[j]
+                    d = minus(vec2, vec)
+                    sup2 = sup - count(d)
+                    if sup2 >= min_sup_count:
+                        suffix.append((item2, d, sup2))
+                if suffix:
+                    eclat(new_prefix, suffix, True)
+                continue
+            for j in range(i + 1, len(items_list)):
+                item2, vec2, _ = items_list[j]
+                inter = vec & vec2
+                sup2 = count(inter)
+                if sup2 >= min_sup_count:
+                    suffix.append((item2, inter, sup2))
+            if not suffix:
                 continue
-            confidence = support_itemset / support_ante
-            if confidence + 1e-12 < min_confidence:
+            # |t(PX) - t(PXY)| = sup(PX) - sup(PXY), so the switch needs no extra set ops
+            if diffset == "always" or (
+                    diffset == "auto"
+                    and sum(sup - sup2 for _, _, sup2 in suffix) < sum(sup2 for _, _, sup2 in suffix)):
+                suffix = [(item2, minus(vec, inter), sup2) for item2, inter, sup2 in suffix]
+                eclat(new_prefix, suffix, True)
+            else:
+                eclat(new_prefix, suffix, False)
+
+    eclat(prefix, items, False, None if classes is None else sorted(classes))
+    return frequent
+
+
+def closed_support_oracle(closed: Dict[Itemset, int]) -> Callable[[Itemset], Optional[int]]:
+    """Support of any frequent itemset as the largest support among its closed supersets."""
+    by_item: Dict[int, List[Itemset]] = {}
+    for itemset in closed:
+        for item in itemset:
+            by_item.setdefault(item, []).append(itemset)
+    cache: Dict[Itemset, Optional[int]] = {}
+
+    def support_of(itemset: Itemset) -> Optional[int]:
+        if itemset not in cache:
+            pool = min((by_item.get(item, []) for item in itemset), key=len)
+            wanted = set(itemset)
+            cache[itemset] = max((closed[c] for c in pool if wanted.issubset(c)), default=None)
+        return cache[itemset]
+    return support_of
+
+
+def tidset_support_oracle(tidsets: Dict[int, Tidset], representation: str) -> Callable[[Itemset], Optional[int]]:
+    """Support of any itemset over frequent items, recounted by intersecting item tidsets."""
+    count = support_counter(representation)
+    cache: Dict[Itemset, Optional[int]] = {}
+
+    def support_of(itemset: Itemset) -> Optional[int]:
+        if itemset not in cache:
+            if any(item not in tidsets for item in itemset):
+                cache[itemset] = None
+            else:
+                t = tidsets[itemset[0]]
+                for item in itemset[1:]:
+                    t = t & tidsets[item]
+                cache[itemset] = count(t)
+        return cache[itemset]
+    return support_of
+
+
+def charm_mine(items: List[Tuple[int, Tidset, int]], min_sup_count: int,
+               representation: str) -> Dict[Itemset, int]:
+    """CHARM: closed frequent itemsets over the same (item, tidset, support) triples."""
+    count = support_counter(representation)
+    key = (lambda t: frozenset(t)) if representation == "set" else (lambda t: t)
+    closed: Dict[Itemset, int] = {}
+    seen: Dict[Any, Itemset] = {}
+
+    def extend(nodes: List[Tuple[Tuple[int, ...], Tidset, int]]):
+        removed = [False] * len(nodes)
+        for i, (x_items, ti, sup_i) in enumerate(nodes):
+            if removed[i]:
                 continue
-            lift = None
-            leverage = None
-            conviction = None
-            if support_cons and support_cons > 0:
-                lift = confidence / support_cons
-                leverage = support_itemset - support_ante * support_cons
-                if 1 - confidence != 0:
-                    conviction = (1 - support_cons) / (1 - confidence)
-            rules.append({
-                "antecedent": tuple(sorted(antecedent)),
-                "consequent": tuple(sorted(consequent)),
-                "support": support_itemset,
-                "confidence": confidence,
-                "lift": lift,
-                "leverage": leverage,
-                "conviction": conviction,
-                "cosine": compute_cosine(support_itemset, lift),
-            })
-    return rules
+            x = set(x_items)
+            children: List[Tuple[Tuple[int, ...], Tidset, int]] = []
+            for j in range(i + 1, len(nodes)):
+                if removed[j]:
+                    continue
+                xj_items, tj, sup_j = nodes[j]
+                t = ti & tj
+                sup = count(t)
+                if sup < min_sup_count:
+                    continue
+                if sup == sup_i and sup == sup_j:
+                    removed[j] = True
+                    x.update(xj_items)
+                elif sup == sup_i:
+                    x.update(xj_items)
+                elif sup == sup_j:
+                    removed[j] = True
+                    children.append((xj_items, t, sup))
+                else:
+                    children.append((xj_items, t, sup))
+            if children:
+                prefix = tuple(x)
+                extend([(prefix + xj_items, t, sup) for xj_items, t, sup in children])
+            k = key(ti)
+            if k not in seen:
+                itemset = tuple(sorted(x))
+                seen[k] = itemset
+                closed[itemset] = sup_i
+
+    extend([((item,), tids, sup) for item, tids, sup in items])
+    return closed
+
+
+def genmax_mine(items: List[Tuple[int, Tidset, int]], min_sup_count: int,
+                representation: str) -> Dict[Itemset, int]:
+    """GenMax-style maximal frequent itemsets with MaxMiner lookahead."""
+    count = support_counter(representation)
+    maximal: Dict[Itemset, int] = {}
+
+    def search(head: frozenset, tail: List[Tuple[int, Tidset, int]], local: List[frozenset]) -> List[frozenset]:
+        found: List[frozenset] = []
+        full = head.union(item for item, _, _ in tail)
+        if any(full <= m for m in local):
+            return found
+        if len(tail) > 1:
+            t = tail[0][1]
+            for _, tids, _ in tail[1:]:
+                t = t & tids
+            sup = count(t)
+            if sup >= min_sup_count:
+                maximal[tuple(sorted(full))] = sup
+                found.append(full)
+                return found
+        for i, (item, ti, sup_i) in enumerate(tail):
+            new_head = head | {item}
+            new_local = [m for m in local if item in m]
+            new_tail = []
+            for item2, tj, _ in tail[i + 1:]:
+                t = ti & tj
+                sup = count(t)
+                if sup >= min_sup_count:
+                    new_tail.append((item2, t, sup))
+            if new_tail:
+                sub_found = search(new_head, new_tail, new_local)
+            elif any(new_head <= m for m in new_local):
+                sub_found = []
+            else:
+                maximal[tuple(sorted(new_head))] = sup_i
+                sub_found = [new_head]
+            found.extend(sub_found)
+            local = local + sub_found
+        return found
+
+    search(frozenset(), items, [])
+    return maximal
+
+
+def _vertical_items(db: TransactionDB, min_sup_count: int,
+                    tidset: str) -> Tuple[str, Dict[int, Tidset], List[Tuple[int, Tidset, int]]]:
+    """Vertical format for the frequent singletons: (representation, item -> tidset, sorted (item, tidset, support))."""
+    freq_items = db.frequent_items(min_sup_count)
+    representation = choose_representation(db, freq_items, tidset)
+    tidsets = build_tidsets(db, freq_items, representation)
+
+    items = [(item, tidsets[item], db.item_counts[item]) for item in freq_items]
+    # Sort by support for deterministic behavior
+    items.sort(key=lambda x: (x[2], x[0]))
+    return representation, tidsets, items
+
+
+def schedule_classes(items: List[Tuple[int, Tidset, int]], workers: int) -> List[List[int]]:
+    """Longest-processing-time assignment of the top-level classes to `workers` (cost: support x suffix length)."""
+    estimates = sorted(((sup * (len(items) - i - 1), i) for i, (_, _, sup) in enumerate(items)), reverse=True)
+    loads = [(0, w) for w in range(workers)]
+    assigned: List[List[int]] = [[] for _ in range(workers)]
+    for cost, i in estimates:
+        load, w = heapq.heappop(loads)
+        assigned[w].append(i)
+        heapq.heappush(loads, (load + cost, w))
+    return [classes for classes in assigned if classes]
+
+
+def _mine_classes(items: List[Tuple[int, Tidset, int]], classes: List[int], min_sup_count: int,
+                  representation: str, diffset: str) -> Dict[Itemset, int]:
+    """Worker task: eclat_mine() restricted to some top-level classes."""
+    return eclat_mine(items, min_sup_count, representation, diffset, classes=classes)
+
+
+def mine_itemsets(transactions: Transactions, min_support: float,
+                  tidset: str = "auto", diffset: str = "auto", workers: int = 1) -> Dict[Itemset, int]:
+    """
+    All frequent itemsets with their support counts, keyed by sorted item-id tuples.
+
+    `workers` > 1 mines the top-level classes in that many processes (serially below PARALLEL_MIN_WORK).
+    """
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return {}
+    min_sup_count = db.min_count(min_support)
+    representation, _, items = _vertical_items(db, min_sup_count, tidset)
+    if workers <= 1 or sum(sup * (len(items) - i - 1) for i, (_, _, sup) in enumerate(items)) < PARALLEL_MIN_WORK:
+        return eclat_mine(items, min_sup_count, representation, diffset)
+
+    schedule = schedule_classes(items, workers)
+    frequent: Dict[Itemset, int] = {}
+    with ProcessPoolExecutor(max_workers=len(schedule)) as pool:
+        futures = [pool.submit(_mine_classes, items, classes, min_sup_count, representation, diffset)
+                   for classes in schedule]
+        for future in futures:
+            frequent.update(future.result())
+    return frequent
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        tidset: str = "auto", diffset: str = "auto", mode: str = "all",
+        workers: int = 1) -> List[Dict[str, Any]]:
+    """
+    Simple Eclat implementation returning association rules.
+
+    `tidset`: "set", "bitset" or "auto"; `diffset`: see eclat_mine(); `mode`: rules from
+    "all", "closed" (CHARM) or "maximal" (GenMax) itemsets; `workers`: see mine_itemsets().
+    """
+    if mode not in ("all", "closed", "maximal"):
+        raise ValueError(f"unknown mining mode: {mode!r}")
+    db = as_transaction_db(transactions)
+    n_tx = db.n_tx
+    if n_tx == 0:
+        return []
+
+    if mode == "all":
+        frequent = mine_itemsets(db, min_support, tidset, diffset, workers)
+        return generate_rules(frequent, n_tx, min_confidence, db.decode)
+
+    min_sup_count = db.min_count(min_support)
+    representation, tidsets, items = _vertical_items(db, min_sup_count, tidset)
+    if mode == "closed":
+        closed = charm_mine(items, min_sup_count, representation)
+        return generate_rules(closed, n_tx, min_confidence, db.decode,
+                              support_of=closed_support_oracle(closed))
+    maximal = genmax_mine(items, min_sup_count, representation)
+    return generate_rules(maximal, n_tx, min_confidence, db.decode,
+                          support_of=tidset_support_oracle(tidsets, representation))
@@ -1,25 +1,228 @@
-from typing import List, Dict, Any
+import heapq
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from mlxtend.frequent_patterns import fpgrowth, association_rules
-from utils import transactions_to_df, compute_cosine
+from utils import Itemset, Transactions, as_transaction_db, transactions_to_df, rules_df_to_records
+from algorithms.rulegen import generate_rules
 
 
-def run(transactions: List[List[str]], min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
-    """Run FP-Growth using mlxtend and return a list of rule dicts."""
-    df = transactions_to_df(transactions)
+class FPTree:
+    """
+    FP-tree stored in parallel arrays instead of node objects.
+
+    Node 0 is the root. For node n: item[n] is its item id, count[n] its count,
+    parent[n] its parent node and link[n] the next node carrying the same item
+    (-1 ends the chain). `head` is the header table (item -> first node of its
+    chain) and `item_counts` the per-item totals over the tree.
+    """
+    __slots__ = ["item", "count", "parent", "link", "children", "head", "item_counts"]
+
+    def __init__(self):
+        self.item = array("i", [-1])
+        self.count = array("l", [0])
+        self.parent = array("i", [-1])
+        self.link = array("i", [-1])
+        self.children: Dict[Tuple[int, int], int] = {}  # (parent node, item) -> child node
+        self.head: Dict[int, int] = {}
+        self.item_counts: Dict[int, int] = {}
+
+    def insert(self, path: Iterable[int], count: int) -> None:
+        """Insert a path (items already in tree order) carrying `count`."""
+        node = 0
+        children = self.children
+        for it in path:
+            child = children.get((node, it))
+            if child is None:
+                child = len(self.item)
+                self.item.append(it)
+                self.count.append(0)
+                self.parent.append(node)
+                self.link.append(self.head.get(it, -1))
+                self.head[it] = child
+                children[(node, it)] = child
+            self.count[child] += count
+            self.item_counts[it] = self.item_counts.get(it, 0) + count
+            node = child
+
+    def single_path(self) -> bool:
+        """True when every node has at most one child (nodes are then created in path order)."""
+        return all(self.parent[n] == n - 1 for n in range(1, len(self.item)))
+
+    def prefix_paths(self, it: int) -> List[Tuple[List[int], int]]:
+        """Conditional pattern base of `it`: (path from root, count) for every node of `it`."""
+        paths = []
+        item, count, parent = self.item, self.count, self.parent
+        node = self.head.get(it, -1)
+        while node != -1:
+            path = []
+            p = parent[node]
+            while p > 0:
+                path.append(item[p])
+                p = parent[p]
+            if path:
+                path.reverse()
+                paths.append((path, count[node]))
+            node = self.link[node]
+        return paths
+
+
+def _build_tree(paths: Iterable[Tuple[Iterable[int], int]], min_count: int, rank: Dict[int, int]) -> FPTree:
+    """Build an FP-tree from weighted paths, dropping items below `min_count`."""
+    paths = list(paths)
+    counts: Dict[int, int] = {}
+    for path, cnt in paths:
+        for it in path:
+            counts[it] = counts.get(it, 0) + cnt
+    keep = {it for it, c in counts.items() if c >= min_count}
+    tree = FPTree()
+    for path, cnt in paths:
+        filtered = sorted((it for it in path if it in keep), key=rank.__getitem__)
+        if filtered:
+            tree.insert(filtered, cnt)
+    return tree
+
+
+def _mine_tree(tree: FPTree, suffix: Itemset, min_count: int, rank: Dict[int, int],
+               frequent: Dict[Itemset, int]) -> None:
+    """Recursive FP-Growth over a (conditional) tree, recording support counts."""
+    if tree.single_path():
+        # Single-path shortcut: every combination of path nodes is frequent, and its
+        # support is the count of its deepest node (counts only shrink along a path)
+        nodes = range(1, len(tree.item))
+        for r in range(1, len(nodes) + 1):
+            for combo in combinations(nodes, r):
+                frequent[tuple(sorted(suffix + tuple(tree.item[n] for n in combo)))] = tree.count[combo[-1]]
+        return
+    # Least frequent items first, as in the header table order
+    for it in sorted(tree.item_counts, key=rank.__getitem__, reverse=True):
+        new_suffix = suffix + (it,)
+        frequent[tuple(sorted(new_suffix))] = tree.item_counts[it]
+        cond_tree = _build_tree(tree.prefix_paths(it), min_count, rank)
+        if len(cond_tree.item) > 1:
+            _mine_tree(cond_tree, new_suffix, min_count, rank, frequent)
+
+
+def group_items(flist: List[int], item_counts: List[int], n_groups: int) -> List[List[int]]:
+    """
+    PFP grouping of the F-list into `n_groups` item groups.
+
+    The conditional pattern base of the item at rank r holds its count(item)
+    transactions cut to at most r items, so count x r estimates the work of
+    its top-level mining. Items are assigned largest estimate first, each to
+    the currently lightest group.
+    """
+    loads = [(0, g) for g in range(n_groups)]
+    groups: List[List[int]] = [[] for _ in range(n_groups)]
+    for cost, it in sorted(((item_counts[it] * r, it) for r, it in enumerate(flist)), reverse=True):
+        load, g = heapq.heappop(loads)
+        groups[g].append(it)
+        heapq.heappush(loads, (load + cost, g))
+    return [group for group in groups if group]
+
+
+def shard_transactions(transactions: Iterable[Itemset], rank: Dict[int, int],
+                       group_of: Dict[int, int], n_groups: int) -> List[Dict[Itemset, int]]:
+    """
+    Group-dependent transactions: for every group g, each transaction (frequent
+    items in F-list order) contributes its prefix up to its last item of g.
+    Identical prefixes are merged into one weighted path.
+    """
+    shards: List[Dict[Itemset, int]] = [{} for _ in range(n_groups)]
+    for tx in transactions:
+        path = tuple(sorted((it for it in tx if it in rank), key=rank.__getitem__))
+        seen = set()
+        for j in range(len(path) - 1, -1, -1):
+            g = group_of[path[j]]
+            if g not in seen:
+                seen.add(g)
+                shard = shards[g]
+                prefix = path[:j + 1]
+                shard[prefix] = shard.get(prefix, 0) + 1
+    return shards
+
+
+def _mine_group(paths: Dict[Itemset, int], group: List[int], min_count: int,
+                rank: Dict[int, int]) -> Dict[Itemset, int]:
+    """
+    Worker task: the itemsets whose last item in F-list order is in `group`.
+
+    The shard holds every transaction containing a group item, cut after its
+    last group item, so the counts of those items and their conditional
+    pattern bases are the same as in the full FP-tree.
+    """
+    frequent: Dict[Itemset, int] = {}
+    tree = _build_tree(paths.items(), min_count, rank)
+    for it in group:
+        if it not in tree.item_counts:
+            continue
+        frequent[(it,)] = tree.item_counts[it]
+        cond_tree = _build_tree(tree.prefix_paths(it), min_count, rank)
+        if len(cond_tree.item) > 1:
+            _mine_tree(cond_tree, (it,), min_count, rank, frequent)
+    return frequent
+
+
+def mine_itemsets(transactions: Transactions, min_support: float,
+                  workers: int = 1, groups: Optional[int] = None) -> Dict[Itemset, int]:
+    """
+    All frequent itemsets with their support counts, keyed by sorted item-id tuples.
+
+    With workers > 1 (or an explicit `groups`) this is Parallel FP-Growth
+    (Li et al., 2008): the F-list is split into `groups` item groups (default
+    `workers`, see group_items()), the transactions are sharded into
+    group-dependent transactions (see shard_transactions()), each shard is
+    mined by its own FP-tree in a process pool, and the disjoint per-group
+    results are merged. workers=1 with groups mines the shards in-process.
+    """
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return {}
+    min_sup_count = db.min_count(min_support)
+
+    # F-list: frequent items by descending support (ties by id)
+    flist = sorted(db.frequent_items(min_sup_count), key=lambda i: (-db.item_counts[i], i))
+    rank = {it: r for r, it in enumerate(flist)}
+
+    frequent: Dict[Itemset, int] = {}
+    if workers <= 1 and groups is None:
+        tree = _build_tree(((tx, 1) for tx in db.transactions), min_sup_count, rank)
+        if len(tree.item) > 1:
+            _mine_tree(tree, (), min_sup_count, rank, frequent)
+        return frequent
+
+    if not flist:
+        return frequent
+    item_groups = group_items(flist, db.item_counts, groups or workers)
+    group_of = {it: g for g, group in enumerate(item_groups) for it in group}
+    shards = shard_transactions(db.transactions, rank, group_of, len(item_groups))
+    if workers <= 1:
+        for shard, group in zip(shards, item_groups):
+            frequent.update(_mine_group(shard, group, min_sup_count, rank))
+        return frequent
+    with ProcessPoolExecutor(max_workers=min(workers, len(item_groups))) as pool:
+        futures = [pool.submit(_mine_group, shard, group, min_sup_count, rank)
+                   for shard, group in zip(shards, item_groups)]
+        for future in futures:
+            frequent.update(future.result())
+    return frequent
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        workers: int = 1, groups: Optional[int] = None) -> List[Dict[str, Any]]:
+    """FP-Growth on an array-backed FP-tree (PFP with workers > 1), returning a list of rule dicts."""
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return []
+    return generate_rules(mine_itemsets(db, min_support, workers, groups), db.n_tx, min_confidence, db.decode)
+
+
+def run_mlxtend(transactions: Transactions, min_support: float, min_confidence: float) -> List[Dict[str, Any]]:
+    """Run FP-Growth using mlxtend and return a list of rule dicts (reference implementation)."""
+    df = transactions_to_df(transactions, sparse=True)
     freq = fpgrowth(df, min_support=min_support, use_colnames=True)
     if freq.empty:
         return []
     rules_df = association_rules(freq, metric="confidence", min_threshold=min_confidence)
-    rules: List[Dict[str, Any]] = []
-    for _, row in rules_df.iterrows():
-        rules.append({
-            "antecedent": tuple(sorted(row["antecedents"])),
-            "consequent": tuple(sorted(row["consequents"])),
-            "support": float(row["support"]),
-            "confidence": float(row["confidence"]),
-            "lift": float(row["lift"]),
-            "leverage": float(row["leverage"]),
-            "conviction": float(row["conviction"]),
-            "cosine": compute_cosine(float(row["support"]), float(row["lift"])),
-        })
-    return rules
+    return rules_df_to_records(rules_df)
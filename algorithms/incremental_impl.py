@@ -0,0 +1,188 @@
+"""
+Incremental frequent itemset maintenance (FUP/FUP2 with a negative border).
+
+The miner keeps exact support counts for the frequent itemsets L and for
+their negative border NB(L): the infrequent itemsets all of whose proper
+subsets are frequent. When a batch arrives, every itemset in L u NB(L) is
+counted over the batch only. An itemset can become frequent only if all of
+its subsets are, so as long as no border itemset is promoted the new L and
+NB(L) lie inside the old L u NB(L) and the update never touches the
+history. Only candidates created by a promotion (supersets of a promoted
+border itemset) are counted over the full history, one scan per level that
+has any.
+"""
+
+import math
+from typing import List, Dict, Any, Iterable, Set
+
+from utils import Itemset, ItemVocabulary, Rule, Transaction, Transactions, as_transaction_db
+from algorithms.candidate_trie import CandidateTrie, apriori_gen
+from algorithms.eclat_impl import mine_itemsets
+from algorithms.rulegen import generate_rules
+
+
+class IncrementalMiner:
+    """
+    Frequent itemsets over a transaction database that only grows.
+
+    The initial database is mined with Eclat; items first seen in a later
+    batch get the next free id, so batches may bring new items. `frequent`
+    and `border` map sorted item-id tuples to exact support counts over all
+    transactions added so far.
+    """
+
+    def __init__(self, transactions: Transactions, min_support: float):
+        db = as_transaction_db(transactions)
+        self.min_support = min_support
+        self.vocab = ItemVocabulary(db.items)
+        self.item_counts: List[int] = list(db.item_counts)
+        self.transactions: List[Itemset] = list(db.transactions)
+        self.frequent: Dict[Itemset, int] = mine_itemsets(db, min_support) if db.n_tx else {}
+        self.border: Dict[Itemset, int] = self._initial_border()
+
+    def _initial_border(self) -> Dict[Itemset, int]:
+        """NB(L) of the initial database: infrequent items and infrequent apriori-gen candidates."""
+        min_count = self.min_count()
+        border = {(item,): cnt for item, cnt in enumerate(self.item_counts) if cnt < min_count}
+        by_size: Dict[int, List[Itemset]] = {}
+        for itemset in self.frequent:
+            by_size.setdefault(len(itemset), []).append(itemset)
+        for k, level in by_size.items():
+            candidates = [c for c in apriori_gen(level) if c not in self.frequent]
+            if candidates:
+                trie = CandidateTrie(candidates)
+                border.update(trie.count(tx for tx in self.transactions if len(tx) > k))
+        return border
+
+    @property
+    def n_tx(self) -> int:
+        return len(self.transactions)
+
+    def min_count(self) -> int:
+        """Current minimum support count (at least 1), as TransactionDB.min_count()."""
+        return max(1, math.ceil(self.min_support * self.n_tx))
+
+    def _count_batch(self, batch: List[Itemset]) -> Set[Itemset]:
+        """
+        Add the batch occurrences of every itemset in L u NB(L) of size >= 2.
+
+        Within a transaction, the level-k members of L u NB(L) it contains are
+        joined from the level-(k-1) frequent itemsets it contains (both
+        generators of a member are frequent), so the work follows the number
+        of contained itemsets. Returns the border itemsets that were touched.
+        """
+        frequent, border = self.frequent, self.border
+        touched: Set[Itemset] = set()
+        for tx in batch:
+            level = [(item,) for item in tx if (item,) in frequent]
+            while len(level) > 1:
+                next_level = []
+                for i, a in enumerate(level):
+                    for b in level[i + 1:]:
+                        if a[:-1] != b[:-1]:
+                            break
+                        c = a + b[-1:]
+                        if c in frequent:
+                            frequent[c] += 1
+                            next_level.append(c)
+                        elif c in border:
+                            border[c] += 1
+                            touched.add(c)
+                level = next_level
+        return touched
+
+    def add(self, transactions: Iterable[Transaction]) -> Dict[str, Any]:
+        """
+        Append a batch of transactions and bring `frequent` and `border` up to date.
+
+        Returns what the update cost: the batch size, how many border itemsets
+        were promoted to frequent, and how many new candidates had to be counted
+        over the full history in how many scans.
+        """
+        batch = [self.vocab.encode(tx) for tx in transactions]
+        self.item_counts.extend([0] * (len(self.vocab) - len(self.item_counts)))
+        self.transactions.extend(batch)
+        frequent, border = self.frequent, self.border
+
+        touched = self._count_batch(batch)
+        for tx in batch:
+            for item in tx:
+                self.item_counts[item] += 1
+        for item in {item for tx in batch for item in tx}:
+            if (item,) in frequent:
+                frequent[(item,)] = self.item_counts[item]
+            else:
+                border[(item,)] = self.item_counts[item]
+                touched.add((item,))
+
+        # Only touched border itemsets can cross the (rising) threshold upwards,
+        # while any frequent itemset can fall below it
+        min_count = self.min_count()
+        promote: Dict[int, List[Itemset]] = {}
+        for itemset in touched:
+            if border[itemset] >= min_count:
+                promote.setdefault(len(itemset), []).append(itemset)
+        demote: Dict[int, List[Itemset]] = {}
+        for itemset, cnt in frequent.items():
+            if cnt < min_count:
+                demote.setdefault(len(itemset), []).append(itemset)
+
+        # Every itemset of size >= 2 in L u NB(L) is made of items frequent before this update
+        old_singles = [itemset[0] for itemset in frequent if len(itemset) == 1]
+        stats = {"transactions": len(batch), "promoted": 0, "rescanned": 0, "full_scans": 0}
+        gained: List[Itemset] = []
+        lost: List[Itemset] = []
+        top = max(list(promote) + list(demote), default=0)
+        k = 1
+        while k <= top or gained or lost:
+            new_gained: List[Itemset] = []
+            new_lost: List[Itemset] = []
+            # Supersets of itemsets that stopped being frequent leave L u NB(L)
+            dropped: Set[Itemset] = set()
+            for itemset in lost:
+                for item in old_singles:
+                    if item not in itemset:
+                        c = tuple(sorted(itemset + (item,)))
+                        if c in frequent:
+                            del frequent[c]
+                            new_lost.append(c)
+                            dropped.add(c)
+                        elif border.pop(c, None) is not None:
+                            dropped.add(c)
+            # Itemsets all of whose subsets just became frequent enter L u NB(L)
+            unknown: Set[Itemset] = set()
+            if gained:
+                singles = [item for item, cnt in enumerate(self.item_counts) if cnt >= min_count]
+            for itemset in gained:
+                for item in singles:
+                    if item not in itemset:
+                        c = tuple(sorted(itemset + (item,)))
+                        if c not in frequent and c not in border and c not in unknown and all(
+                                c[:x] + c[x + 1:] in frequent for x in range(k)):
+                            unknown.add(c)
+            if unknown:
+                trie = CandidateTrie(sorted(unknown))
+                for c, cnt in trie.count(tx for tx in self.transactions if len(tx) >= k).items():
+                    if cnt >= min_count:
+                        frequent[c] = cnt
+                        new_gained.append(c)
+                    else:
+                        border[c] = cnt
+                stats["rescanned"] += len(unknown)
+                stats["full_scans"] += 1
+            for itemset in promote.get(k, ()):
+                if itemset not in dropped:
+                    frequent[itemset] = border.pop(itemset)
+                    new_gained.append(itemset)
+                    stats["promoted"] += 1
+            for itemset in demote.get(k, ()):
+                if itemset not in dropped:
+                    border[itemset] = frequent.pop(itemset)
+                    new_lost.append(itemset)
+            gained, lost = new_gained, new_lost
+            k += 1
+        return stats
+
+    def rules(self, min_confidence: float) -> List[Rule]:
+        """Association rules over everything added so far (shared ap-genrules)."""
+        return generate_rules(self.frequent, self.n_tx, min_confidence, self.vocab.decode)
@@ -0,0 +1,165 @@
+"""
+Approximate one-pass frequent itemset mining with Lossy Counting
+(Manku & Motwani, "Approximate Frequency Counts over Data Streams", 2002).
+
+The stream is cut into buckets of w = ceil(1 / epsilon) transactions and
+processed in batches of `batch_buckets` buckets held in memory. Every tracked
+itemset X has an entry (f, delta): f counts X since the entry was created and
+delta bounds how often X can have occurred before. For each batch of beta
+buckets, with b the number of buckets seen so far:
+
+- every entry adds its count in the batch, and is dropped if f + delta <= b;
+- every itemset with at least beta occurrences in the batch that has no entry
+  yet gets one with delta = b - beta. These itemsets are found by mining the
+  batch with eclat_mine() at min count beta.
+
+An itemset without an entry has occurred at most b times, and every entry
+satisfies f <= true count <= f + delta <= f + b. With N transactions seen,
+b <= ceil(epsilon * N), so reporting the entries with f >= ceil(s * N) - b
+guarantees:
+
+- no false negatives: every itemset with support >= s is reported;
+- bounded false positives: every reported itemset has true support at least
+  s - epsilon (up to the rounding of one transaction);
+- bounded error: reported counts underestimate the true counts by at most
+  ceil(epsilon * N).
+
+Memory is bounded by the batch buffer plus the entries; for single items the
+paper bounds the entries by (1 / epsilon) * log(epsilon * N).
+"""
+
+import math
+from typing import List, Dict, Iterable, Optional
+
+from utils import Itemset, ItemVocabulary, Rule, Transaction
+from algorithms.eclat_impl import eclat_mine
+from algorithms.rulegen import generate_rules
+
+
+class LossyCounter:
+    """One-pass Lossy Counting over a transaction stream (see the module docstring)."""
+
+    def __init__(self, epsilon: float, batch_buckets: int = 10):
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be in (0, 1)")
+        self.epsilon = epsilon
+        self.width = math.ceil(1 / epsilon)
+        self.batch_buckets = max(1, batch_buckets)
+        self.vocab = ItemVocabulary()
+        self.counts: Dict[Itemset, int] = {}   # f of every tracked itemset
+        self.deltas: Dict[Itemset, int] = {}   # delta of every tracked itemset
+        self.buffer: List[Itemset] = []
+        self.n_tx = 0
+
+    @property
+    def buckets(self) -> int:
+        """Buckets seen so far (the last one may be partial)."""
+        return math.ceil(self.n_tx / self.width)
+
+    def push(self, tx: Transaction) -> None:
+        """Add one transaction; a full buffer of batch_buckets buckets is processed at once."""
+        self.buffer.append(self.vocab.encode(tx))
+        if len(self.buffer) >= self.batch_buckets * self.width:
+            self.flush()
+
+    def extend(self, transactions: Iterable[Transaction]) -> None:
+        for tx in transactions:
+            self.push(tx)
+
+    def flush(self) -> None:
+        """
+        Process the buffered transactions as one batch (possibly ending mid-bucket).
+
+        A batch must start at least one new bucket: when an earlier flush
+        already opened the bucket the buffer falls in, beta would be 0 and no
+        itemset of the batch could be left untracked, so the transactions stay
+        buffered until the stream crosses the next bucket boundary.
+        """
+        if not self.buffer:
+            return
+        prev_buckets = self.buckets
+        beta = math.ceil((self.n_tx + len(self.buffer)) / self.width) - prev_buckets
+        if beta < 1:
+            return
+        batch = self.buffer
+        self.buffer = []
+        self.n_tx += len(batch)
+        b_current = self.buckets
+
+        # Batch tidsets as bitsets over positions in the batch
+        bits: Dict[int, int] = {}
+        for pos, tx in enumerate(batch):
+            mask = 1 << pos
+            for item in tx:
+                bits[item] = bits.get(item, 0) | mask
+
+        counts, deltas = self.counts, self.deltas
+        for itemset in list(counts):
+            vec = -1
+            for item in itemset:
+                vec &= bits.get(item, 0)
+                if not vec:
+                    break
+            f = counts[itemset] + (vec.bit_count() if vec else 0)
+            if f + deltas[itemset] <= b_current:
+                del counts[itemset]
+                del deltas[itemset]
+            else:
+                counts[itemset] = f
+
+        items = [(item, vec, vec.bit_count()) for item, vec in bits.items()]
+        items = [x for x in items if x[2] >= beta]
+        items.sort(key=lambda x: (x[2], x[0]))
+        for itemset, f in eclat_mine(items, max(1, beta), "bitset").items():
+            if itemset not in counts:
+                counts[itemset] = f
+                deltas[itemset] = b_current - beta
+
+    def itemsets(self, min_support: float) -> Dict[Itemset, int]:
+        """
+        Itemsets reported at `min_support` with their (under-)estimated counts:
+        every entry with f >= ceil(min_support * N) - b, N counting the
+        processed transactions. Flushes the buffer first (see flush() for
+        the transactions that may stay buffered).
+        """
+        _check_epsilon(self.epsilon, min_support)
+        self.flush()
+        if self.n_tx == 0:
+            return {}
+        threshold = max(1, math.ceil(min_support * self.n_tx)) - self.buckets
+        return {itemset: f for itemset, f in self.counts.items() if f >= threshold}
+
+
+def _check_epsilon(epsilon: float, min_support: float) -> None:
+    # With epsilon >= s the threshold ceil(s * N) - b drops to (at most) zero
+    if epsilon >= min_support:
+        raise ValueError(f"epsilon ({epsilon}) must be smaller than min_support ({min_support})")
+
+
+def mine_itemsets(transactions: Iterable[Transaction], min_support: float,
+                  epsilon: Optional[float] = None, batch_buckets: int = 10) -> Dict[Itemset, int]:
+    """
+    Approximate frequent itemsets in one pass; keys are item ids in order of
+    first appearance. `epsilon` defaults to min_support / 10.
+    """
+    epsilon = epsilon or min_support / 10
+    _check_epsilon(epsilon, min_support)
+    counter = LossyCounter(epsilon, batch_buckets)
+    counter.extend(transactions)
+    return counter.itemsets(min_support)
+
+
+def run(transactions: Iterable[Transaction], min_support: float, min_confidence: float,
+        epsilon: Optional[float] = None, batch_buckets: int = 10) -> List[Rule]:
+    """
+    Lossy Counting itemsets followed by the shared rule generation. Supports
+    of antecedents and consequents fall back to any tracked entry, so rule
+    metrics are estimates within the same error bound.
+    """
+    epsilon = epsilon or min_support / 10
+    _check_epsilon(epsilon, min_support)
+    counter = LossyCounter(epsilon, batch_buckets)
+    counter.extend(transactions)
+    frequent = counter.itemsets(min_support)
+    return generate_rules(frequent, counter.n_tx, min_confidence, counter.vocab.decode,
+                          support_of=counter.counts.get)
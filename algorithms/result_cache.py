@@ -0,0 +1,164 @@
+"""
+Persistent on-disk cache of frequent itemsets (with support counts).
+
+An entry is keyed by a content hash of the transaction database plus the
+algorithm name, its parameters and the min_support it was mined at, and
+stores the counts together with the metrics measured when they were mined.
+Transaction order does not affect the hash, so differently ordered copies
+of the same transactions share entries.
+
+Frequent itemsets are downward closed and the counts are exact, so an entry
+mined at support s also answers any s' >= s: the itemsets frequent at s'
+are those whose count reaches it (as in rules_by_support()). A lookup takes
+the exact entry if there is one, else the highest cached support below the
+requested one.
+
+Cached counts and timings are only valid for the code that produced them,
+so callers pass source_version() of the engine module as a parameter:
+editing the engine (or a project module it imports) changes the key and the
+old entries are never hit again, aging out through eviction.
+
+Entries are pickled files in one directory, described by `index.json`. Each
+hit or store refreshes the entry's last-used time, and once the files exceed
+`max_bytes` the least recently used entries are evicted.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from types import ModuleType
+from typing import Dict, Any, Optional
+
+from utils import Itemset, TransactionDB
+
+INDEX_FILE = "index.json"
+
+
+def source_version(module: ModuleType) -> str:
+    """
+    SHA-256 (truncated) over the source of `module` and of every project
+    module (utils, algorithms.*) it imports or imports names from.
+    """
+    names = {module.__name__}
+    for value in vars(module).values():
+        name = value.__name__ if isinstance(value, ModuleType) else getattr(value, "__module__", None)
+        if isinstance(name, str) and (name == "utils" or name.startswith("algorithms.")):
+            names.add(name)
+    h = hashlib.sha256()
+    for name in sorted(names):
+        with open(sys.modules[name].__file__, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class ResultCache:
+    """Frequent-itemset cache in `directory`, bounded to `max_bytes` of entry files."""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.index: Dict[str, Dict[str, Any]] = {}
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+            # Drop entries whose file went missing
+            self.index = {name: meta for name, meta in self.index.items()
+                          if os.path.exists(os.path.join(directory, name))}
+
+    @staticmethod
+    def dataset_hash(db: TransactionDB) -> str:
+        """SHA-256 over the vocabulary and the sorted encoded transactions."""
+        h = hashlib.sha256()
+        h.update("\n".join(db.items).encode("utf-8"))
+        h.update(b"\0")
+        for tx in sorted(db.transactions):
+            h.update(" ".join(map(str, tx)).encode("ascii"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(meta["bytes"] for meta in self.index.values())
+
+    def _save_index(self) -> None:
+        tmp = os.path.join(self.directory, INDEX_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, os.path.join(self.directory, INDEX_FILE))
+
+    def get(self, db: TransactionDB, algorithm: str, min_support: float,
+            **params: Any) -> Optional[Dict[str, Any]]:
+        """
+        Cached result for these parameters, or None. The result holds
+        `counts` (filtered to min_support), `metrics` (as stored) and
+        `mined_at`, the support the entry was actually mined at.
+        """
+        dataset = self.dataset_hash(db)
+        key = json.dumps(params, sort_keys=True)
+        best = None
+        for name, meta in self.index.items():
+            if (meta["dataset"] == dataset and meta["algorithm"] == algorithm and meta["params"] == key
+                    and meta["min_support"] <= min_support
+                    and (best is None or meta["min_support"] > self.index[best]["min_support"])):
+                best = name
+        if best is None:
+            return None
+        with open(os.path.join(self.directory, best), "rb") as f:
+            entry = pickle.load(f)
+        meta = self.index[best]
+        meta["last_used"] = time.time()
+        self._save_index()
+
+        counts: Dict[Itemset, int] = entry["counts"]
+        if meta["min_support"] < min_support:
+            min_count = db.min_count(min_support)
+            counts = {itemset: cnt for itemset, cnt in counts.items() if cnt >= min_count}
+        return {"counts": counts, "metrics": entry["metrics"], "mined_at": meta["min_support"]}
+
+    def put(self, db: TransactionDB, algorithm: str, min_support: float, counts: Dict[Itemset, int],
+            metrics: Optional[Dict[str, Any]] = None, **params: Any) -> None:
+        """Store a result (replacing an existing one), then evict down to max_bytes."""
+        dataset = self.dataset_hash(db)
+        key = json.dumps(params, sort_keys=True)
+        name = hashlib.sha256(f"{dataset}|{algorithm}|{key}|{min_support!r}".encode("utf-8")).hexdigest()[:32] + ".pkl"
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"counts": counts, "metrics": metrics}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.index[name] = {
+            "dataset": dataset, "algorithm": algorithm, "params": key, "min_support": min_support,
+            "bytes": os.path.getsize(path), "last_used": time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the entry files fit in max_bytes."""
+        total = self.total_bytes
+        for name in sorted(self.index, key=lambda n: self.index[n]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(name)["bytes"]
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for name in list(self.index):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        self.index = {}
+        self._save_index()
@@ -0,0 +1,183 @@
+"""
+关联规则生成 - 所有原生算法共用
+Shared ap-genrules rule generation over integer-encoded itemsets.
+
+Consequents are grown level by level only from consequents that already
+passed min_confidence: conf(I - H -> H) can only drop when H grows, so a
+failing consequent prunes all its supersets. Each consequent level is
+processed for all itemsets at once, with confidence and the final metrics
+(support, confidence, lift, leverage, conviction, cosine) computed on NumPy
+arrays of support counts.
+"""
+
+from typing import List, Dict, Any, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import Itemset, Rule, Transactions, TransactionDB, as_transaction_db
+
+# Slack on the confidence threshold, shared with the mlxtend-based engines' rounding
+CONFIDENCE_EPS = 1e-12
+
+
+def _join_consequents(consequents: List[Itemset]) -> List[Itemset]:
+    """apriori-gen on the confident consequents of one itemset (sorted tuples of equal size)."""
+    confident = set(consequents)
+    consequents = sorted(consequents)
+    m = len(consequents[0])
+    joined = []
+    for i in range(len(consequents)):
+        a = consequents[i]
+        for j in range(i + 1, len(consequents)):
+            b = consequents[j]
+            if a[:-1] != b[:-1]:
+                break
+            cand = a + b[-1:]
+            # Every m-subset of the new consequent must itself have been confident
+            if all(cand[:x] + cand[x + 1:] in confident for x in range(m - 1)):
+                joined.append(cand)
+    return joined
+
+
+def generate_rules(counts: Dict[Itemset, int], n_tx: int, min_confidence: float,
+                   decode: Callable[[Itemset], Tuple[Any, ...]],
+                   support_of: Optional[Callable[[Itemset], Optional[int]]] = None,
+                   itemsets: Optional[Sequence[Itemset]] = None) -> List[Rule]:
+    """
+    ap-genrules over `counts` (sorted itemset tuple -> support count).
+
+    Rules are generated from `itemsets` (default: every itemset in `counts`);
+    antecedent and consequent supports are looked up in `counts`, falling back
+    to `support_of` when given. A rule whose antecedent support is unknown is
+    skipped; an unknown consequent support leaves lift and the metrics derived
+    from it as None. `decode` turns an itemset back into the output tuple.
+    """
+    if n_tx == 0:
+        return []
+    lookup = counts.get
+    if support_of is not None:
+        def lookup(itemset: Itemset) -> Optional[int]:
+            cnt = counts.get(itemset)
+            return support_of(itemset) if cnt is None else cnt
+
+    sources = sorted(i for i in (counts if itemsets is None else itemsets) if len(i) >= 2)
+    source_counts = [counts[i] if i in counts else lookup(i) for i in sources]
+
+    rule_src: List[int] = []
+    rule_ante: List[Itemset] = []
+    rule_cons: List[Itemset] = []
+    rule_cnt: List[int] = []
+    rule_ante_cnt: List[int] = []
+
+    # Level 1: single-item consequents of every itemset
+    frontier: List[Tuple[int, Itemset]] = [(s, (item,)) for s, itemset in enumerate(sources) for item in itemset]
+    while frontier:
+        antes: List[Itemset] = []
+        ante_cnt: List[float] = []
+        for s, cons in frontier:
+            cons_set = set(cons)
+            ante = tuple(item for item in sources[s] if item not in cons_set)
+            antes.append(ante)
+            cnt = lookup(ante)
+            ante_cnt.append(np.nan if not cnt else cnt)
+        supp = np.array([source_counts[s] for s, _ in frontier], dtype=float) / n_tx
+        supp_ante = np.array(ante_cnt, dtype=float) / n_tx
+        with np.errstate(invalid="ignore"):
+            confident = supp / supp_ante + CONFIDENCE_EPS >= min_confidence
+
+        grown: Dict[int, List[Itemset]] = {}
+        for idx in np.flatnonzero(confident).tolist():
+            s, cons = frontier[idx]
+            rule_src.append(s)
+            rule_ante.append(antes[idx])
+            rule_cons.append(cons)
+            rule_cnt.append(source_counts[s])
+            rule_ante_cnt.append(int(ante_cnt[idx]))
+            if len(cons) + 1 < len(sources[s]):
+                grown.setdefault(s, []).append(cons)
+        frontier = [(s, cons) for s, conss in grown.items() for cons in _join_consequents(conss)]
+
+    if not rule_src:
+        return []
+
+    order = np.argsort(np.array(rule_src), kind="stable").tolist()
+    cons_cnt = [lookup(rule_cons[i]) for i in order]
+    return build_rules([rule_ante[i] for i in order], [rule_cons[i] for i in order],
+                       [rule_cnt[i] for i in order], [rule_ante_cnt[i] for i in order],
+                       cons_cnt, n_tx, decode)
+
+
+def build_rules(antecedents: Sequence[Itemset], consequents: Sequence[Itemset],
+                rule_counts: Sequence[int], ante_counts: Sequence[int],
+                cons_counts: Sequence[Optional[int]], n_tx: int,
+                decode: Callable[[Itemset], Tuple[Any, ...]]) -> List[Rule]:
+    """
+    Rule dicts for given antecedent/consequent pairs and their support counts,
+    with every metric computed as one NumPy column. A consequent count of None
+    (or 0) leaves lift, leverage, conviction and cosine as None.
+    """
+    if not antecedents:
+        return []
+    supp = np.array(rule_counts, dtype=float) / n_tx
+    supp_ante = np.array(ante_counts, dtype=float) / n_tx
+    supp_cons = np.array([np.nan if not c else c for c in cons_counts], dtype=float) / n_tx
+    confidence = supp / supp_ante
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lift = confidence / supp_cons
+        leverage = supp - supp_ante * supp_cons
+        conviction = (1 - supp_cons) / (1 - confidence)
+        cosine = np.sqrt(supp * lift)
+    # Same conventions as compute_cosine() and the per-rule code this replaces
+    conviction[confidence == 1] = np.nan
+    cosine[~(lift > 0)] = np.nan
+
+    def column(values: np.ndarray) -> List[Optional[float]]:
+        return [None if v != v else v for v in values.tolist()]
+
+    supp_l = supp.tolist()
+    conf_l = confidence.tolist()
+    lift_l = column(lift)
+    lev_l = column(leverage)
+    conv_l = column(conviction)
+    cos_l = column(cosine)
+    return [{
+        "antecedent": decode(antecedents[i]),
+        "consequent": decode(consequents[i]),
+        "support": supp_l[i],
+        "confidence": conf_l[i],
+        "lift": lift_l[i],
+        "leverage": lev_l[i],
+        "conviction": conv_l[i],
+        "cosine": cos_l[i],
+    } for i in range(len(antecedents))]
+
+
+def rules_by_support(counts: Dict[Itemset, int], db: TransactionDB, supports: Sequence[float],
+                     min_confidence: float) -> Dict[float, List[Rule]]:
+    """
+    Rules for several support thresholds from counts mined once at (or below)
+    the lowest of them. Frequent itemsets are downward closed, so the itemsets
+    frequent at a higher threshold are the mined ones whose count reaches it,
+    and every antecedent/consequent of their rules is among them too.
+    """
+    result: Dict[float, List[Rule]] = {}
+    # Ascending, so each threshold filters the survivors of the previous one
+    for s in sorted(set(supports)):
+        min_count = db.min_count(s)
+        counts = {itemset: cnt for itemset, cnt in counts.items() if cnt >= min_count}
+        result[s] = generate_rules(counts, db.n_tx, min_confidence, db.decode)
+    return {s: result[s] for s in supports}
+
+
+def mine_levels(mine_itemsets: Callable[..., Dict[Itemset, int]], transactions: Transactions,
+                supports: Sequence[float], min_confidence: float, **kwargs: Any) -> Dict[float, List[Rule]]:
+    """
+    Mine once with an engine's mine_itemsets() at min(supports) and derive
+    the rules of every threshold by filtering, see rules_by_support().
+    Extra keyword arguments go to `mine_itemsets`.
+    """
+    if not supports:
+        return {}
+    db = as_transaction_db(transactions)
+    counts = mine_itemsets(db, min(supports), **kwargs)
+    return rules_by_support(counts, db, supports, min_confidence)
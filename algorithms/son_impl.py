@@ -0,0 +1,133 @@
+"""
+SON (Savasere, Omiecinski & Navathe) partitioned mining over a process pool.
+
+Phase 1 splits the transactions into partitions and mines each one with a
+local engine at the same relative min_support. An itemset that is frequent
+overall is frequent in at least one partition (otherwise its count would be
+below s * |p| in every partition, hence below s * n overall), so the union
+of the local results is a superset of the answer. Phase 2 counts that union
+over every partition with the candidate prefix trie and keeps the itemsets
+whose global count reaches the threshold, so the result equals a serial run
+exactly. Both phases run one task per partition in a ProcessPoolExecutor.
+
+The local engine is any algorithms module exposing mine_itemsets(), named
+by module so workers can import it.
+
+A MappedTransactions input is never loaded as a whole: its partitions are
+row ranges, which pickle as the file prefix, so each worker re-opens the
+mapping and reads only its own rows.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple, Union
+
+from utils import (Itemset, Transactions, TransactionDB, MappedTransactions, MIN_SAMPLE_COUNT, as_transaction_db,
+                   mine_subset)
+from algorithms.candidate_trie import CandidateTrie
+from algorithms.rulegen import generate_rules
+
+ENGINES = ("eclat_impl", "fpgrowth_impl", "apriori_hash_trie_impl", "apriori_improved_impl", "apriori_impl")
+
+# Encoded transactions, or a (dataset, start, stop) row range of a mapped one
+Partition = Union[List[Itemset], Tuple[MappedTransactions, int, int]]
+
+
+def _rows(part: Partition) -> Iterable[Itemset]:
+    if isinstance(part, tuple):
+        mapped, start, stop = part
+        return mapped.rows(start, stop)
+    return part
+
+
+def _mine_partition(engine: str, part: Partition, min_support: float) -> List[Itemset]:
+    """Phase 1 task: locally frequent itemsets of one partition, in global item ids."""
+    return list(mine_subset(import_module(f"algorithms.{engine}").mine_itemsets, _rows(part), min_support))
+
+
+def _count_partition(part: Partition, candidates: Dict[int, List[Itemset]]) -> Dict[int, List[int]]:
+    """Phase 2 task: counts of every candidate (grouped by size) in one pass over a partition."""
+    tries = sorted((k, CandidateTrie(level)) for k, level in candidates.items())
+    for tx in _rows(part):
+        for k, trie in tries:
+            if len(tx) < k:
+                break
+            trie.count_transaction(tx)
+    return {k: trie.counts for k, trie in tries}
+
+
+def _group_by_size(local: Sequence[List[Itemset]]) -> Dict[int, List[Itemset]]:
+    """Union of the local results, as sorted candidate lists per itemset size."""
+    union = {itemset for itemsets in local for itemset in itemsets}
+    grouped: Dict[int, List[Itemset]] = {}
+    for itemset in sorted(union):
+        grouped.setdefault(len(itemset), []).append(itemset)
+    return grouped
+
+
+def partition(db: Union[TransactionDB, MappedTransactions], n_parts: int) -> List[Partition]:
+    """Split the transactions into `n_parts` contiguous, near-equal partitions (row ranges if mapped)."""
+    n_parts = max(1, min(n_parts, db.n_tx))
+    size, extra = divmod(db.n_tx, n_parts)
+    parts: List[Partition] = []
+    start = 0
+    for p in range(n_parts):
+        end = start + size + (p < extra)
+        parts.append((db, start, end) if isinstance(db, MappedTransactions) else db.transactions[start:end])
+        start = end
+    return parts
+
+
+def mine_itemsets(transactions: Transactions, min_support: float, engine: str = "eclat_impl",
+                  partitions: Optional[int] = None, workers: Optional[int] = None) -> Dict[Itemset, int]:
+    """
+    Frequent itemsets by SON; the result (ids and counts) equals
+    `engine`.mine_itemsets() on the whole database. `partitions` defaults to
+    `workers`, which defaults to the number of CPUs; workers=1 runs both
+    phases in-process.
+
+    When `partitions` is not given, it is also capped so every partition
+    keeps at least MIN_SAMPLE_COUNT / min_support transactions, down to a
+    single partition for small inputs; an explicit `partitions` is used as is.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine: {engine!r}")
+    db = transactions if isinstance(transactions, MappedTransactions) else as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return {}
+    workers = workers or os.cpu_count() or 1
+    if partitions is None:
+        partitions = max(1, min(workers, int(min_support * db.n_tx // MIN_SAMPLE_COUNT)))
+    parts = partition(db, partitions)
+    workers = min(workers, len(parts))
+
+    if workers == 1:
+        local = [_mine_partition(engine, part, min_support) for part in parts]
+        candidates = _group_by_size(local)
+        part_counts = [_count_partition(part, candidates) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            local = list(pool.map(_mine_partition, [engine] * len(parts), parts, [min_support] * len(parts)))
+            candidates = _group_by_size(local)
+            part_counts = list(pool.map(_count_partition, parts, [candidates] * len(parts)))
+
+    min_sup_count = db.min_count(min_support)
+    frequent: Dict[Itemset, int] = {}
+    for k, level in candidates.items():
+        for idx, itemset in enumerate(level):
+            cnt = sum(counts[k][idx] for counts in part_counts)
+            if cnt >= min_sup_count:
+                frequent[itemset] = cnt
+    return frequent
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        engine: str = "eclat_impl", partitions: Optional[int] = None,
+        workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """SON mining (see mine_itemsets()) followed by the shared rule generation."""
+    db = transactions if isinstance(transactions, MappedTransactions) else as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return []
+    frequent = mine_itemsets(db, min_support, engine, partitions, workers)
+    return generate_rules(frequent, db.n_tx, min_confidence, db.decode)
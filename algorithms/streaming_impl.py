@@ -0,0 +1,82 @@
+"""
+Sliding-window frequent itemsets over a transaction stream.
+
+The window holds the last `window` transactions in a ring of slots: the t-th
+transaction of the stream lives in slot t % window until it is overwritten.
+Every item keeps a bitset over the slots (an Eclat tidset whose bit positions
+are slots instead of tids) plus its count in the window, so arrival and expiry
+each touch only the items of one transaction. Itemsets and rules are mined
+on demand with eclat_mine() over the current bitsets and cached until the
+window moves again. Memory is bounded by the window: the ring, one
+window-sized bitset per item, and the vocabulary.
+"""
+
+import math
+from typing import List, Dict, Iterable, Optional
+
+from utils import Itemset, ItemVocabulary, Rule, Transaction
+from algorithms.eclat_impl import eclat_mine
+from algorithms.rulegen import generate_rules
+
+
+class StreamingMiner:
+    """Frequent itemsets and rules over the last `window` transactions pushed."""
+
+    def __init__(self, window: int, min_support: float, diffset: str = "auto"):
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.min_support = min_support
+        self.diffset = diffset
+        self.vocab = ItemVocabulary()
+        self.bits: List[int] = []           # item id -> bitset over window slots
+        self.item_counts: List[int] = []    # item id -> count within the window
+        self.slots: List[Optional[Itemset]] = [None] * window
+        self.n_seen = 0
+        self._frequent: Optional[Dict[Itemset, int]] = None
+
+    def __len__(self) -> int:
+        return min(self.n_seen, self.window)
+
+    def min_count(self) -> int:
+        """Minimum support count over the current window (at least 1)."""
+        return max(1, math.ceil(self.min_support * len(self)))
+
+    def push(self, tx: Transaction) -> None:
+        """Slide the window by one transaction, expiring the oldest once full."""
+        slot = self.n_seen % self.window
+        mask = 1 << slot
+        bits, counts = self.bits, self.item_counts
+        expired = self.slots[slot]
+        if expired is not None:
+            for item in expired:
+                bits[item] &= ~mask
+                counts[item] -= 1
+        encoded = self.vocab.encode(tx)
+        grown = len(self.vocab) - len(bits)
+        bits.extend([0] * grown)
+        counts.extend([0] * grown)
+        for i in encoded:
+            bits[i] |= mask
+            counts[i] += 1
+        self.slots[slot] = encoded
+        self.n_seen += 1
+        self._frequent = None
+
+    def extend(self, transactions: Iterable[Transaction]) -> None:
+        """Push every transaction of an iterable (e.g. utils.iter_transactions())."""
+        for tx in transactions:
+            self.push(tx)
+
+    def itemsets(self) -> Dict[Itemset, int]:
+        """Frequent itemsets of the current window with their support counts."""
+        if self._frequent is None:
+            min_count = self.min_count()
+            items = [(i, self.bits[i], cnt) for i, cnt in enumerate(self.item_counts) if cnt >= min_count]
+            items.sort(key=lambda x: (x[2], x[0]))
+            self._frequent = eclat_mine(items, min_count, "bitset", self.diffset) if self.n_seen else {}
+        return self._frequent
+
+    def rules(self, min_confidence: float) -> List[Rule]:
+        """Association rules of the current window (shared ap-genrules)."""
+        return generate_rules(self.itemsets(), len(self), min_confidence, self.vocab.decode)
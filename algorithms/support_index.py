@@ -0,0 +1,195 @@
+"""
+Bitmap support index: support, confidence and the other rule metrics of
+arbitrary itemsets, mined or not, without re-scanning the transactions.
+
+Built once per dataset, it keeps one container per item, chosen per item as
+in Roaring bitmaps: a packed NumPy uint64 bitmap over all transactions
+(n_tx / 8 bytes) for items at least that dense, else the sorted int32 tid
+array (4 bytes per occurrence). Memory is therefore at most that of the
+bitmaps and at most four bytes per (transaction, item) pair.
+
+The support count of an itemset of bitmap items is the popcount of the AND
+of their rows (np.bitwise_count, or a byte lookup table on NumPy < 2.0).
+With an array item, its tids (the rarest such array) are intersected with
+the other arrays and filtered by bit tests on the bitmap rows. Results are
+memoized in an LRU keyed by the item-id tuple, and count_many() answers
+batches, ANDing and popcounting the rows of all bitmap-only queries of the
+same size at once.
+"""
+
+from collections import OrderedDict
+from itertools import chain
+from typing import List, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import Itemset, Rule, Transactions, as_transaction_db
+from algorithms.rulegen import build_rules
+
+# Upper bound on the uint64 words a batched AND materializes at once (32 MB)
+BATCH_WORDS = 1 << 22
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of uint64 words, summed over the last axis."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT_TABLE[np.ascontiguousarray(words).view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+class SupportIndex:
+    """Support counts of arbitrary itemsets over one dataset (see the module docstring)."""
+
+    def __init__(self, transactions: Transactions, memo_size: int = 4096):
+        db = as_transaction_db(transactions)
+        self.db = db
+        self.n_tx = db.n_tx
+        self.n_words = (db.n_tx + 63) // 64
+        self.memo_size = memo_size
+        self.memo: "OrderedDict[Itemset, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        lengths = np.fromiter((len(tx) for tx in db.transactions), dtype=np.int64, count=db.n_tx)
+        items = np.fromiter(chain.from_iterable(db.transactions), dtype=np.int32, count=int(lengths.sum()))
+        tids = np.repeat(np.arange(db.n_tx, dtype=np.int32), lengths)
+        counts = np.bincount(items, minlength=db.n_items)
+
+        # Bitmap when the tid array would be at least as large
+        dense = counts * 4 >= self.n_words * 8
+        self.rows = np.full(db.n_items, -1, dtype=np.int64)
+        self.rows[dense] = np.arange(int(dense.sum()))
+        self.bitmaps = np.zeros((int(dense.sum()), self.n_words), dtype=np.uint64)
+        sel = dense[items]
+        t = tids[sel].astype(np.int64)
+        np.bitwise_or.at(self.bitmaps, (self.rows[items[sel]], t >> 6),
+                         np.left_shift(np.uint64(1), (t & 63).astype(np.uint64)))
+
+        # Stable sort by item keeps each item's tids ascending
+        order = np.argsort(items, kind="stable")
+        sorted_tids = tids[order]
+        starts = np.zeros(db.n_items + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        self.arrays: Dict[int, np.ndarray] = {
+            i: sorted_tids[starts[i]:starts[i + 1]].copy() for i in np.flatnonzero(~dense).tolist()}
+        self.item_counts: List[int] = counts.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the containers."""
+        return self.bitmaps.nbytes + sum(a.nbytes for a in self.arrays.values())
+
+    def encode(self, itemset: Iterable[str]) -> Optional[Itemset]:
+        """Items -> sorted id tuple, or None if some item never occurs."""
+        ids = self.db.item_ids
+        try:
+            return tuple(sorted({ids[item] for item in itemset}))
+        except KeyError:
+            return None
+
+    def _count_ids(self, ids: Itemset) -> int:
+        if not ids:
+            return self.n_tx
+        if len(ids) == 1:
+            return self.item_counts[ids[0]]
+        sparse = sorted((i for i in ids if self.rows[i] < 0), key=self.item_counts.__getitem__)
+        rows = [self.rows[i] for i in ids if self.rows[i] >= 0]
+        if not sparse:
+            acc = self.bitmaps[rows[0]] & self.bitmaps[rows[1]]
+            for r in rows[2:]:
+                acc &= self.bitmaps[r]
+            return int(popcount(acc))
+        tids = self.arrays[sparse[0]]
+        for i in sparse[1:]:
+            tids = np.intersect1d(tids, self.arrays[i], assume_unique=True)
+        for r in rows:
+            if not len(tids):
+                break
+            words = self.bitmaps[r][tids >> 6]
+            tids = tids[((words >> (tids & 63).astype(np.uint64)) & np.uint64(1)).astype(bool)]
+        return len(tids)
+
+    def _remember(self, ids: Itemset, count: int) -> None:
+        self.memo[ids] = count
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+
+    def count_ids(self, ids: Itemset) -> int:
+        """Support count of a sorted item-id tuple (TransactionDB ids), memoized."""
+        count = self.memo.get(ids)
+        if count is not None:
+            self.hits += 1
+            self.memo.move_to_end(ids)
+            return count
+        self.misses += 1
+        count = self._count_ids(ids)
+        self._remember(ids, count)
+        return count
+
+    def count(self, itemset: Iterable[str]) -> int:
+        """Support count of an itemset given by items; 0 if an item never occurs."""
+        ids = self.encode(itemset)
+        return 0 if ids is None else self.count_ids(ids)
+
+    def support(self, itemset: Iterable[str]) -> float:
+        return self.count(itemset) / self.n_tx if self.n_tx else 0.0
+
+    def count_many(self, itemsets: Iterable[Iterable[str]]) -> List[int]:
+        """Support counts of many itemsets; memo misses of bitmap-only itemsets are vectorized by size."""
+        encoded = [self.encode(itemset) for itemset in itemsets]
+        result: List[int] = [0] * len(encoded)
+        # Distinct bitmap-only misses by size -> their positions in the batch
+        pending: Dict[int, Dict[Itemset, List[int]]] = {}
+        for pos, ids in enumerate(encoded):
+            if ids is None:
+                continue
+            count = self.memo.get(ids)
+            if count is not None:
+                self.hits += 1
+                self.memo.move_to_end(ids)
+                result[pos] = count
+            elif len(ids) > 1 and all(self.rows[i] >= 0 for i in ids):
+                pending.setdefault(len(ids), {}).setdefault(ids, []).append(pos)
+            else:
+                result[pos] = self.count_ids(ids)
+
+        step = max(1, BATCH_WORDS // max(1, self.n_words))
+        for k, by_ids in pending.items():
+            batch = list(by_ids)
+            rows = self.rows[np.array(batch, dtype=np.int64)]
+            for lo in range(0, len(batch), step):
+                chunk = rows[lo:lo + step]
+                acc = self.bitmaps[chunk[:, 0]] & self.bitmaps[chunk[:, 1]]
+                for j in range(2, k):
+                    acc &= self.bitmaps[chunk[:, j]]
+                for ids, count in zip(batch[lo:lo + step], popcount(acc).tolist()):
+                    self.misses += 1
+                    self._remember(ids, count)
+                    for pos in by_ids[ids]:
+                        result[pos] = count
+        return result
+
+    def rules(self, pairs: Sequence[Tuple[Iterable[str], Iterable[str]]]) -> List[Optional[Rule]]:
+        """
+        Rule dicts (same metrics as mined rules) for (antecedent, consequent)
+        pairs, in order; None where the antecedent never occurs, since its
+        confidence is undefined. All supports come from one count_many() call.
+        """
+        antes = [tuple(a) for a, _ in pairs]
+        conses = [tuple(c) for _, c in pairs]
+        counts = self.count_many(antes + conses + [a + c for a, c in zip(antes, conses)])
+        m = len(antes)
+        keep = [i for i in range(m) if counts[i] > 0]
+        built = build_rules([antes[i] for i in keep], [conses[i] for i in keep],
+                            [counts[2 * m + i] for i in keep], [counts[i] for i in keep],
+                            [counts[m + i] for i in keep], self.n_tx, lambda items: tuple(sorted(set(items))))
+        result: List[Optional[Rule]] = [None] * m
+        for i, rule in zip(keep, built):
+            result[i] = rule
+        return result
+
+    def rule(self, antecedent: Iterable[str], consequent: Iterable[str]) -> Optional[Rule]:
+        """Metrics of a single rule, e.g. index.rule({"拍照", "清晰"}, {"性价比"})."""
+        return self.rules([(antecedent, consequent)])[0]
@@ -0,0 +1,118 @@
+"""
+Sampling-based frequent itemset mining with negative-border verification
+(Toivonen, "Sampling Large Databases for Association Rules", 1996).
+
+A random sample of the transactions is mined with Eclat at a lowered
+threshold, giving a downward-closed set S of probably-frequent itemsets.
+Its negative border NB(S) (the itemsets not in S all of whose proper subsets
+are) is the set of itemsets that could be frequent without the sample
+noticing: if no itemset of NB(S) is frequent in the full database, every
+frequent itemset lies in S. So S u NB(S) is counted in one pass over the
+full database, and the frequent ones are the exact answer.
+
+When a border itemset does turn out to be frequent, the answer may extend
+beyond S. The miner then computes the negative border of the frequent
+itemsets found so far, counts only the itemsets not counted yet in another
+pass, and repeats until that border brings nothing new, so the result is
+always exact; the lowering of the threshold only decides how often that
+extra pass is needed.
+"""
+
+from typing import List, Dict, Any, Iterable, Tuple
+
+from utils import (Itemset, Transactions, TransactionDB, MIN_SAMPLE_COUNT, as_transaction_db,
+                   mine_subset, sample_transactions)
+from algorithms.candidate_trie import CandidateTrie, apriori_gen
+from algorithms.eclat_impl import mine_itemsets as eclat_mine_itemsets
+from algorithms.rulegen import generate_rules
+
+
+def negative_border(itemsets: Iterable[Itemset]) -> List[Itemset]:
+    """
+    Itemsets of size >= 2 in the negative border of a downward-closed set:
+    the apriori-gen candidates of each level that are not in the set.
+    """
+    itemsets = set(itemsets)
+    by_size: Dict[int, List[Itemset]] = {}
+    for itemset in itemsets:
+        by_size.setdefault(len(itemset), []).append(itemset)
+    return [c for level in by_size.values() for c in apriori_gen(level) if c not in itemsets]
+
+
+def count_pass(db: TransactionDB, candidates: Iterable[Itemset]) -> Dict[Itemset, int]:
+    """Count candidates of any sizes in a single scan (one CandidateTrie per size)."""
+    by_size: Dict[int, List[Itemset]] = {}
+    for c in candidates:
+        by_size.setdefault(len(c), []).append(c)
+    tries = sorted((k, CandidateTrie(sorted(level))) for k, level in by_size.items())
+    for tx in db.transactions:
+        for k, trie in tries:
+            if len(tx) < k:
+                break
+            trie.count_transaction(tx)
+    return {c: cnt for _, trie in tries for c, cnt in zip(trie.candidates, trie.counts)}
+
+
+def toivonen_mine(transactions: Transactions, min_support: float, sample_ratio: float = 0.2,
+                  lowering: float = 0.8, seed: int = 42) -> Tuple[Dict[Itemset, int], Dict[str, Any]]:
+    """
+    Exact frequent itemsets (as mine_itemsets()) plus how they were obtained:
+    the sample size, |S|, |NB(S)|, the number of full passes and how many
+    border itemsets turned out frequent. The sample is mined at
+    `lowering` x min_support and holds at least MIN_SAMPLE_COUNT / min_support
+    transactions; when that is the whole database (or min_support <= 0) it
+    is mined directly.
+    """
+    db = as_transaction_db(transactions)
+    stats = {"sample": 0, "sample_frequent": 0, "border": 0, "passes": 0, "border_frequent": 0}
+    if db.n_tx == 0:
+        return {}, stats
+    min_count = db.min_count(min_support)
+    # At min_support <= 0 every itemset is frequent and no sample can tell
+    ratio = max(sample_ratio, MIN_SAMPLE_COUNT / (min_support * db.n_tx)) if min_support > 0 else 1
+    if ratio >= 1:
+        stats["sample"] = db.n_tx
+        stats["passes"] = 1
+        return eclat_mine_itemsets(db, min_support), stats
+
+    sample = sample_transactions(db.transactions, ratio, seed)
+    in_sample = set(mine_subset(eclat_mine_itemsets, sample, min_support * lowering))
+    stats["sample"] = len(sample)
+    stats["sample_frequent"] = len(in_sample)
+
+    # Single items are counted exactly by TransactionDB already
+    frequent = {(i,): cnt for i, cnt in enumerate(db.item_counts) if cnt >= min_count}
+    border = negative_border(in_sample)
+    stats["border"] = len(border) + sum(1 for i in range(db.n_items) if (i,) not in in_sample)
+    stats["border_frequent"] = sum(1 for x in frequent if x not in in_sample)
+
+    counted = {x for x in in_sample if len(x) > 1} | set(border)
+    to_count = counted
+    while to_count:
+        stats["passes"] += 1
+        for itemset, cnt in count_pass(db, to_count).items():
+            if cnt >= min_count:
+                frequent[itemset] = cnt
+                if itemset not in in_sample:
+                    stats["border_frequent"] += 1
+        # Nothing outside the counted set can be frequent unless the border of
+        # the frequent itemsets found so far reaches beyond it
+        to_count = [c for c in negative_border(frequent) if c not in counted]
+        counted.update(to_count)
+    return frequent, stats
+
+
+def mine_itemsets(transactions: Transactions, min_support: float, sample_ratio: float = 0.2,
+                  lowering: float = 0.8, seed: int = 42) -> Dict[Itemset, int]:
+    """All frequent itemsets with their support counts, keyed by sorted item-id tuples."""
+    return toivonen_mine(transactions, min_support, sample_ratio, lowering, seed)[0]
+
+
+def run(transactions: Transactions, min_support: float, min_confidence: float,
+        sample_ratio: float = 0.2, lowering: float = 0.8, seed: int = 42) -> List[Dict[str, Any]]:
+    """Toivonen sampling (see toivonen_mine()) followed by the shared rule generation."""
+    db = as_transaction_db(transactions)
+    if db.n_tx == 0:
+        return []
+    frequent = mine_itemsets(db, min_support, sample_ratio, lowering, seed)
+    return generate_rules(frequent, db.n_tx, min_confidence, db.decode)
@@ -0,0 +1,106 @@
+"""
+Top-k association rules without a min_support threshold (TopKRules-style).
+
+Rules are grown from two-item seeds i -> j by left expansions (add an item
+larger than every antecedent item) and right expansions (add an item larger
+than every consequent item); left-expanded rules are only expanded further
+to the left, so every rule has exactly one generation path. Support only
+shrinks along a path, so once k rules meeting min_confidence are held, the
+internal support threshold rises to the weakest of them and every candidate
+below it is pruned. Candidates are expanded best-support-first.
+
+Support is the ranking measure the threshold can follow: confidence and lift
+are not anti-monotone under expansion (a longer antecedent can raise both),
+so they only order the k rules returned.
+"""
+
+import heapq
+from itertools import count as counter
+from typing import List, Dict, Any, Set, Tuple
+
+from utils import Itemset, Transactions, as_transaction_db
+from algorithms.eclat_impl import build_tidsets
+from algorithms.rulegen import CONFIDENCE_EPS, build_rules
+
+
+def run_topk(transactions: Transactions, k: int, min_confidence: float,
+             order_by: str = "support") -> List[Dict[str, Any]]:
+    """
+    Select the k highest-support rules with confidence >= min_confidence.
+
+    The k rules are found in a single search and returned ordered by
+    `order_by` ("support", "confidence" or "lift", descending); the ordering
+    only re-sorts those k rules, it does not change which rules are selected.
+    """
+    if order_by not in ("support", "confidence", "lift"):
+        raise ValueError(f"unknown order key: {order_by!r}")
+    db = as_transaction_db(transactions)
+    n_tx = db.n_tx
+    if n_tx == 0 or k <= 0:
+        return []
+
+    tidsets: Dict[int, Set[int]] = build_tidsets(db, range(db.n_items), "set")
+    item_counts = db.item_counts
+    min_count = 1
+    tie = counter()
+
+    # Current best rules, a min-heap on support: (support, seq, X, Y, sup(X), sup(Y))
+    top: List[Tuple[int, int, Itemset, Itemset, int, int]] = []
+    # Rules to expand, a max-heap on support:
+    # (-support, seq, X, Y, t(X), t(Y), t(XY), left_only)
+    candidates: List[Tuple[int, int, Itemset, Itemset, Set[int], Set[int], Set[int], bool]] = []
+
+    def consider(x: Itemset, y: Itemset, tx: Set[int], ty: Set[int], txy: Set[int], left_only: bool) -> None:
+        nonlocal min_count
+        sup = len(txy)
+        if sup < min_count:
+            return
+        if sup / len(tx) + CONFIDENCE_EPS >= min_confidence:
+            heapq.heappush(top, (sup, next(tie), x, y, len(tx), len(ty)))
+            if len(top) > k:
+                heapq.heappop(top)
+            if len(top) == k:
+                # Only rules beating the current k-th best can still enter
+                min_count = max(min_count, top[0][0] + 1)
+        # Even a non-confident rule may lead to confident ones by left expansion
+        heapq.heappush(candidates, (-sup, next(tie), x, y, tx, ty, txy, left_only))
+
+    frequent = [i for i in range(db.n_items) if item_counts[i] >= min_count]
+    for a_pos, i in enumerate(frequent):
+        ti = tidsets[i]
+        for j in frequent[a_pos + 1:]:
+            if item_counts[i] < min_count or item_counts[j] < min_count:
+                continue
+            tj = tidsets[j]
+            tij = ti & tj
+            if len(tij) < min_count:
+                continue
+            consider((i,), (j,), ti, tj, tij, False)
+            consider((j,), (i,), tj, ti, tij, False)
+
+    while candidates:
+        neg_sup, _, x, y, tx, ty, txy, left_only = heapq.heappop(candidates)
+        if -neg_sup < min_count:
+            break
+        # Items co-occurring with X u Y, with the support of the expanded rule
+        co_counts: Dict[int, int] = {}
+        for tid in txy:
+            for item in db.transactions[tid]:
+                co_counts[item] = co_counts.get(item, 0) + 1
+        max_x, max_y = x[-1], y[-1]
+        in_rule = set(x) | set(y)
+        for c, sup in co_counts.items():
+            if sup < min_count or c in in_rule:
+                continue
+            tc = tidsets[c]
+            if c > max_x:
+                consider(x + (c,), y, tx & tc, ty, txy & tc, True)
+            if not left_only and c > max_y:
+                consider(x, y + (c,), tx, ty & tc, txy & tc, False)
+
+    best = sorted(top, key=lambda r: (-r[0], r[2], r[3]))
+    rules = build_rules([r[2] for r in best], [r[3] for r in best], [r[0] for r in best],
+                        [r[4] for r in best], [r[5] for r in best], n_tx, db.decode)
+    if order_by != "support":
+        rules.sort(key=lambda r: -(r[order_by] or 0.0))
+    return rules
@@ -29,10 +29,18 @@ def plot_performance_by_support() -> None:
         return
     
     df = pd.read_csv(perf_file)
+    # 默认模式下只有 mined_at == min_support 的行包含挖掘开销，其余行只是由计数过滤
+    # 派生规则的耗时，与独立运行不可比，不放进按支持度的性能曲线
+    if 'mined_at' in df.columns:
+        derived = df['mined_at'] != df['min_support']
+        if derived.any():
+            print(f"ℹ 跳过 {int(derived.sum())} 行派生结果（mined_at != min_support）；"
+                  f"完整曲线请用 run_by_support.py --per-threshold 生成")
+        df = df[~derived]
     
     # 创建 2x2 子图
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    fig.suptitle('按最小支持度的性能对比', fontsize=16, fontweight='bold')
+    fig.suptitle('按最小支持度的性能对比（仅独立挖掘的结果）', fontsize=16, fontweight='bold')
     
     # 1. 运行时间柱状图
     ax1 = axes[0, 0]
@@ -1,17 +1,28 @@
 import os
 import sys
 import csv
-from typing import Dict, Callable
+import argparse
+from types import ModuleType
+from typing import Dict
 
 # 自动配置项目路径
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, ROOT)
 
-from utils import load_transactions, sample_transactions, eval_rules_comprehensive, profile_execution
+from utils import load_transactions, sample_transactions, TransactionDB, eval_rules_comprehensive, profile_execution
 from algorithms import apriori_impl, fpgrowth_impl, eclat_impl, apriori_hash_trie_impl
+from algorithms.result_cache import ResultCache, source_version
+from algorithms.rulegen import rules_by_support
 
 
 def main():
+    parser = argparse.ArgumentParser(description="按数据集规模对比各算法")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="忽略并且不写入结果缓存（results/.cache），每个组合都重新挖掘",
+    )
+    args = parser.parse_args()
+
     data_path = os.path.join(ROOT, "data", "transactions.txt")
     transactions_all = load_transactions(data_path)
 
@@ -20,15 +31,17 @@ def main():
     min_support = 0.005
     scales = [0.2, 0.4, 0.6, 0.8, 1.0]
 
-    algos: Dict[str, Callable] = {
-        "apriori": apriori_impl.run,
-        "fpgrowth": fpgrowth_impl.run,
-        "eclat": eclat_impl.run,
-        "apriori_improved": apriori_hash_trie_impl.run,
+    algos: Dict[str, ModuleType] = {
+        "apriori": apriori_impl,
+        "fpgrowth": fpgrowth_impl,
+        "eclat": eclat_impl,
+        "apriori_improved": apriori_hash_trie_impl,
     }
 
     results_dir = os.path.join(ROOT, "results")
     os.makedirs(results_dir, exist_ok=True)
+    # 频繁项集缓存：键为数据集内容哈希 + 算法 + 参数，重复运行时跳过挖掘
+    cache = None if args.no_cache else ResultCache(os.path.join(results_dir, ".cache"))
 
     # ==================== 性能指标 CSV ====================
     perf_csv = os.path.join(results_dir, "performance_by_scale.csv")
@@ -45,9 +58,10 @@ def main():
         
         # 性能指标 CSV 头部
         pw = csv.writer(fperf)
+        # cached: 挖掘结果取自缓存，耗时与内存为当初挖掘时的测量值（加上本次规则生成）
         pw.writerow([
             "algorithm", "scale", "min_support", "min_conf",
-            "runtime_sec", "memory_mb"
+            "runtime_sec", "memory_mb", "cached"
         ])
 
         # 规则质量 CSV 头部
@@ -68,17 +82,31 @@ def main():
 
         # 运行实验
         for r in scales:
-            subset = sample_transactions(transactions_all, ratio=r, seed=42)
-            for name, fn in algos.items():
-                # 执行算法并收集性能和规则数据
-                rules, metrics = profile_execution(fn, subset, min_support=min_support, min_confidence=min_conf)
+            # 每个规模只编码一次，所有算法共享
+            subset = TransactionDB(sample_transactions(transactions_all, ratio=r, seed=42))
+            for name, module in algos.items():
+                # 挖掘频繁项集（命中缓存则直接取用），再统一生成规则
+                # 引擎源码的哈希也是键的一部分：修改算法实现后旧结果（及其耗时）不再命中
+                version = source_version(module)
+                hit = cache.get(subset, name, min_support, engine=version) if cache is not None else None
+                if hit is not None:
+                    counts, mine_metrics = hit["counts"], hit["metrics"]
+                else:
+                    counts, mine_metrics = profile_execution(module.mine_itemsets, subset, min_support=min_support)
+                    if cache is not None:
+                        cache.put(subset, name, min_support, counts, mine_metrics, engine=version)
+                by_support, metrics = profile_execution(rules_by_support, counts, subset, [min_support], min_conf)
+                rules = by_support[min_support]
+                metrics["runtime_sec"] += mine_metrics["runtime_sec"]
+                metrics["memory_mb"] = max(metrics["memory_mb"], mine_metrics["memory_mb"])
                 stats = eval_rules_comprehensive(rules)
                 
                 # 写性能指标
                 pw.writerow([
                     name, r, min_support, min_conf,
                     f"{metrics['runtime_sec']:.6f}",
-                    f"{metrics['memory_mb']:.2f}"
+                    f"{metrics['memory_mb']:.2f}",
+                    hit is not None,
                 ])
                 # 写规则质量指标
                 qw.writerow([
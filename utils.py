@@ -1,38 +1,339 @@
 import math
+import os
 import random
 import time
 import tracemalloc
-from typing import List, Sequence, Tuple, Dict, Any, Callable
+from typing import List, Sequence, Tuple, Dict, Any, Callable, Iterable, Iterator, Optional, Union
 from collections import defaultdict
+from itertools import chain, islice
+import numpy as np
 import pandas as pd
 
 
 Transaction = List[str]
 Rule = Dict[str, Any]
+Itemset = Tuple[int, ...]
+
+# Expected occurrences of an itemset at min_support that a sample or partition
+# must hold. Below a few dozen, a local threshold at the same relative support
+# is a count of 1 or 2 and the local result explodes into nearly every subset
+# of the transactions.
+MIN_SAMPLE_COUNT = 20
+
+
+def iter_transactions(path: str) -> Iterator[Transaction]:
+    """Lazily yield transactions from a plain text file, one line at a time (same format as load_transactions)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            tx = line.split()
+            if tx:
+                yield tx
+
+
+def iter_transaction_chunks(path: str, chunk_size: int = 10000) -> Iterator[List[Transaction]]:
+    """Yield the transactions of a text file in lists of at most `chunk_size`; only one chunk is held at a time."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    transactions = iter_transactions(path)
+    while True:
+        chunk = list(islice(transactions, chunk_size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def load_transactions(path: str) -> List[Transaction]:
     """Load transactions from a plain text file (one space-separated transaction per line)."""
+    return list(iter_transactions(path))
+
+
+def count_transactions(path: str) -> int:
+    """Number of (non-empty) transactions in a text file, without splitting lines into items."""
     with open(path, "r", encoding="utf-8") as f:
-        return [line.strip().split() for line in f if line.strip()]
+        return sum(1 for line in f if not line.isspace())
+
+
+def reservoir_sample(transactions: Iterable[Any], k: int, seed: int = 42) -> List[Any]:
+    """
+    Uniform sample of `k` elements of an iterable of unknown length, in one
+    pass and O(k) memory (reservoir sampling, Li's Algorithm L: the gaps
+    between replacements are drawn directly, so skipped elements cost no
+    random numbers). Returns everything when there are at most k elements.
+    """
+    rng = random.Random(seed)
+    it = iter(transactions)
+    reservoir = list(islice(it, k))
+    if len(reservoir) < k or k <= 0:
+        return reservoir
+    w = math.exp(math.log(rng.random()) / k)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - w))
+        nxt = next(islice(it, skip, None), None)
+        if nxt is None:
+            return reservoir
+        reservoir[rng.randrange(k)] = nxt
+        w *= math.exp(math.log(rng.random()) / k)
+
+
+def sample_transactions(transactions: Iterable[Transaction], ratio: float, seed: int = 42,
+                        total: Optional[int] = None) -> List[Transaction]:
+    """
+    Sample a proportion of transactions (without replacement).
+
+    Lists are sampled with random.sample as before. Any other iterable (e.g.
+    iter_transactions() over a file larger than memory) is sampled in one
+    pass by reservoir_sample(); the sample size needs the number of
+    transactions, taken from len() when available or else from `total`
+    (see count_transactions()).
+    """
+    if isinstance(transactions, list):
+        n = max(1, int(len(transactions) * ratio))
+        random.seed(seed)
+        return random.sample(transactions, n)
+    if total is None:
+        if not hasattr(transactions, "__len__"):
+            raise ValueError("total is required to sample a fraction of an iterator")
+        total = len(transactions)
+    return reservoir_sample(transactions, max(1, int(total * ratio)), seed)
 
 
-def sample_transactions(transactions: List[Transaction], ratio: float, seed: int = 42) -> List[Transaction]:
-    """Sample a proportion of transactions (without replacement)."""
-    n = max(1, int(len(transactions) * ratio))
-    random.seed(seed)
-    return random.sample(transactions, n)
+class TransactionDB:
+    """
+    整数编码的事务数据库，由 load_transactions 的输出构建一次，供所有算法共享
+
+    属性:
+        - items: 词表，编号 -> 项目（按字符串排序，编号顺序与项目顺序一致）
+        - item_ids: 反向词表，项目 -> 编号
+        - transactions: 每条事务去重、排序后的编号元组（空事务保留，tid 与原始下标一致）
+        - item_counts: 每个项目出现的事务数
+        - n_tx: 事务总数
+    """
 
+    def __init__(self, transactions: Iterable[Transaction]):
+        transactions = list(transactions)
+        self.items: List[str] = sorted({item for tx in transactions for item in tx})
+        self.item_ids: Dict[str, int] = {item: i for i, item in enumerate(self.items)}
+        ids = self.item_ids
+        self.transactions: List[Itemset] = [tuple(sorted({ids[item] for item in tx})) for tx in transactions]
+        self.item_counts: List[int] = [0] * len(self.items)
+        counts = self.item_counts
+        for tx in self.transactions:
+            for i in tx:
+                counts[i] += 1
+        self.n_tx = len(self.transactions)
 
-def transactions_to_df(transactions: List[Transaction]) -> pd.DataFrame:
-    """Convert list of transactions to one-hot DataFrame for mlxtend."""
-    # Build item universe
-    items = sorted({item for tx in transactions for item in tx})
-    data = []
-    for tx in transactions:
-        row = {item: (item in tx) for item in items}
-        data.append(row)
-    return pd.DataFrame(data)
+    def __len__(self) -> int:
+        return self.n_tx
+
+    def __iter__(self) -> Iterator[Itemset]:
+        return iter(self.transactions)
+
+    def __getitem__(self, tid: int) -> Itemset:
+        return self.transactions[tid]
+
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+
+    def min_count(self, min_support: float) -> int:
+        """把相对最小支持度换算为最小支持计数（至少为1）"""
+        return max(1, math.ceil(min_support * self.n_tx))
+
+    def frequent_items(self, min_count: int) -> List[int]:
+        """返回支持计数不低于 min_count 的项目编号（升序）"""
+        return [i for i, c in enumerate(self.item_counts) if c >= min_count]
+
+    def encode(self, itemset: Iterable[str]) -> Itemset:
+        """项目 -> 排序后的编号元组"""
+        return tuple(sorted({self.item_ids[item] for item in itemset}))
+
+    def decode(self, itemset: Iterable[int]) -> Tuple[str, ...]:
+        """编号 -> 排序后的项目元组（即规则输出中的 antecedent / consequent 格式）"""
+        return tuple(sorted(self.items[i] for i in itemset))
+
+    @classmethod
+    def from_encoded(cls, items: List[str], transactions: List[Itemset]) -> "TransactionDB":
+        """由已编码的数据直接构建（词表已排序、事务为排序去重的编号元组），跳过字符串编码"""
+        db = cls.__new__(cls)
+        db.items = items
+        db.item_ids = {item: i for i, item in enumerate(items)}
+        db.transactions = transactions
+        db.item_counts = [0] * len(items)
+        counts = db.item_counts
+        for tx in transactions:
+            for i in tx:
+                counts[i] += 1
+        db.n_tx = len(transactions)
+        return db
+
+
+class ItemVocabulary:
+    """Vocabulary of a transaction stream: items get ids in order of first appearance."""
+
+    def __init__(self, items: Iterable[str] = ()):
+        self.items: List[str] = list(items)
+        self.item_ids: Dict[str, int] = {item: i for i, item in enumerate(self.items)}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def encode(self, tx: Iterable[str]) -> Itemset:
+        """Items -> sorted id tuple, giving unseen items the next free ids."""
+        ids = self.item_ids
+        encoded = set()
+        for item in tx:
+            i = ids.get(item)
+            if i is None:
+                i = ids[item] = len(self.items)
+                self.items.append(item)
+            encoded.add(i)
+        return tuple(sorted(encoded))
+
+    decode = TransactionDB.decode
+
+
+def mine_subset(mine_itemsets: Callable[..., Dict[Itemset, int]], transactions: Iterable[Itemset],
+                min_support: float, **kwargs) -> Dict[Itemset, int]:
+    """
+    Mine a subset of encoded transactions (a partition or a sample) with an
+    engine's mine_itemsets(), keyed by the original item ids.
+    """
+    local = TransactionDB(transactions)
+    return {local.decode(itemset): cnt for itemset, cnt in mine_itemsets(local, min_support, **kwargs).items()}
+
+
+def save_transactions_csr(transactions: Iterable[Transaction], prefix: str) -> None:
+    """
+    Write transactions in the binary CSR format read by MappedTransactions:
+    `<prefix>.offsets.npy` (int64, n_tx + 1 row starts), `<prefix>.items.npy`
+    (int32 item ids, each row sorted and de-duplicated, ids as in
+    TransactionDB) and `<prefix>.vocab.txt` (one item per line, id order).
+    """
+    db = transactions if isinstance(transactions, TransactionDB) else TransactionDB(transactions)
+    lengths = np.fromiter((len(tx) for tx in db.transactions), dtype=np.int64, count=db.n_tx)
+    offsets = np.zeros(db.n_tx + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    items = np.fromiter(chain.from_iterable(db.transactions), dtype=np.int32, count=int(offsets[-1]))
+    np.save(f"{prefix}.offsets.npy", offsets)
+    np.save(f"{prefix}.items.npy", items)
+    with open(f"{prefix}.vocab.txt", "w", encoding="utf-8") as f:
+        f.writelines(f"{item}\n" for item in db.items)
+
+
+def convert_transactions(path: str, prefix: Optional[str] = None) -> str:
+    """Convert a transactions text file to the CSR format (prefix defaults to the path minus extension)."""
+    prefix = prefix or os.path.splitext(path)[0]
+    save_transactions_csr(iter_transactions(path), prefix)
+    return prefix
+
+
+class MappedTransactions:
+    """
+    Read-only view of a dataset written by save_transactions_csr().
+
+    Both arrays are memory-mapped, so opening is near-instant, nothing is
+    copied until a row is read, and processes opening the same files share
+    the pages through the OS cache. Transaction t is the int32 slice
+    items[offsets[t]:offsets[t + 1]]; iteration yields these slices and
+    rows() converts them to id tuples one block at a time. Instances pickle
+    by prefix and re-map the files on load.
+
+    apriori_scan_impl and son_impl read the rows directly (SON workers get
+    row ranges and re-open the files). Every other engine goes through
+    as_transaction_db(), which loads the whole dataset into a TransactionDB.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.offsets = np.load(f"{prefix}.offsets.npy", mmap_mode="r")
+        self.item_array = np.load(f"{prefix}.items.npy", mmap_mode="r")
+        with open(f"{prefix}.vocab.txt", "r", encoding="utf-8") as f:
+            self.items: List[str] = [line.rstrip("\n") for line in f]
+        self.n_tx = len(self.offsets) - 1
+
+    def __reduce__(self):
+        return MappedTransactions, (self.prefix,)
+
+    def __len__(self) -> int:
+        return self.n_tx
+
+    def __getitem__(self, tid: int) -> np.ndarray:
+        return self.item_array[self.offsets[tid]:self.offsets[tid + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        items = self.item_array
+        starts = self.offsets.tolist()
+        for a, b in zip(starts, starts[1:]):
+            yield items[a:b]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None, chunk_size: int = 10000) -> Iterator[Itemset]:
+        """Transactions start..stop as sorted id tuples, read `chunk_size` rows at a time."""
+        stop = self.n_tx if stop is None else min(stop, self.n_tx)
+        for lo in range(start, stop, chunk_size):
+            starts = self.offsets[lo:min(lo + chunk_size, stop) + 1].tolist()
+            base = starts[0]
+            flat = self.item_array[base:starts[-1]].tolist()
+            for a, b in zip(starts, starts[1:]):
+                yield tuple(flat[a - base:b - base])
+
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+
+    @property
+    def item_counts(self) -> List[int]:
+        """Per-item transaction counts, in one pass over the item array."""
+        return np.bincount(self.item_array, minlength=self.n_items).tolist()
+
+    min_count = TransactionDB.min_count
+    decode = TransactionDB.decode
+
+    def to_transaction_db(self) -> TransactionDB:
+        """Load every row into a TransactionDB with the same ids, without parsing or re-encoding."""
+        return TransactionDB.from_encoded(list(self.items), list(self.rows()))
+
+
+Transactions = Union[List[Transaction], TransactionDB, MappedTransactions]
+
+
+def as_transaction_db(transactions: Transactions) -> TransactionDB:
+    """算法入口统一调用：已编码的 TransactionDB 直接复用，内存映射数据整体载入，否则现场编码"""
+    if isinstance(transactions, TransactionDB):
+        return transactions
+    if isinstance(transactions, MappedTransactions):
+        return transactions.to_transaction_db()
+    return TransactionDB(transactions)
+
+
+def transactions_to_csr(transactions: Transactions):
+    """Transactions as a scipy CSR bool matrix (rows = transactions, columns = item ids)."""
+    from scipy.sparse import csr_matrix
+
+    db = as_transaction_db(transactions)
+    lengths = np.fromiter((len(tx) for tx in db.transactions), dtype=np.int64, count=db.n_tx)
+    indptr = np.zeros(db.n_tx + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter(chain.from_iterable(db.transactions), dtype=np.int32, count=int(indptr[-1]))
+    data = np.ones(len(indices), dtype=bool)
+    return csr_matrix((data, indices, indptr), shape=(db.n_tx, db.n_items))
+
+
+def transactions_to_df(transactions: Transactions, sparse: bool = False) -> pd.DataFrame:
+    """
+    Convert list of transactions to one-hot DataFrame for mlxtend.
+
+    With sparse=True the frame is built straight from a CSR matrix and has
+    SparseDtype columns, so memory follows the number of (transaction, item)
+    pairs rather than n_tx * n_items; mlxtend's apriori/fpgrowth accept both.
+    """
+    db = as_transaction_db(transactions)
+    columns = pd.Index(db.items)
+    if sparse:
+        return pd.DataFrame.sparse.from_spmatrix(transactions_to_csr(db), columns=columns)
+    onehot = np.zeros((db.n_tx, db.n_items), dtype=bool)
+    for tid, tx in enumerate(db.transactions):
+        onehot[tid, list(tx)] = True
+    return pd.DataFrame(onehot, columns=columns)
 
 
 def compute_cosine(support: float, lift: float):
@@ -44,6 +345,39 @@ def compute_cosine(support: float, lift: float):
     return math.sqrt(support * lift)
 
 
+def rules_df_to_records(rules_df: pd.DataFrame) -> List[Rule]:
+    """
+    Convert mlxtend association_rules output to rule dicts column by column.
+
+    Equivalent to converting row by row with float() and compute_cosine(),
+    but metrics come out of NumPy columns and the dicts are built in one pass.
+    """
+    if rules_df.empty:
+        return []
+    antecedents = [tuple(sorted(s)) for s in rules_df["antecedents"]]
+    consequents = [tuple(sorted(s)) for s in rules_df["consequents"]]
+    support = rules_df["support"].to_numpy(dtype=float)
+    lift = rules_df["lift"].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        cosine = np.sqrt(support * lift)
+    # compute_cosine() convention: undefined for non-positive support or lift
+    cosine_l: List[Any] = cosine.tolist()
+    for i in np.flatnonzero((support <= 0) | (lift <= 0)).tolist():
+        cosine_l[i] = None
+    keys = ("antecedent", "consequent", "support", "confidence", "lift", "leverage", "conviction", "cosine")
+    columns = zip(
+        antecedents,
+        consequents,
+        support.tolist(),
+        rules_df["confidence"].to_numpy(dtype=float).tolist(),
+        lift.tolist(),
+        rules_df["leverage"].to_numpy(dtype=float).tolist(),
+        rules_df["conviction"].to_numpy(dtype=float).tolist(),
+        cosine_l,
+    )
+    return [dict(zip(keys, values)) for values in columns]
+
+
 def eval_rules(rules: Sequence[Rule]) -> Dict[str, Any]:
     """Aggregate basic quality metrics from a rule list."""
     if not rules: